@@ -0,0 +1,67 @@
+"""
+Load time of compressed .jsonl entity files, split into decompression and
+parsing. Decompression streams well ahead of parsing, so loading is bound
+by parsing and I/O (smaller compressed files) rather than decompression.
+
+Usage: python benchmarks/compressed_load.py [--size 1000000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from fuzztypes import EntitySource
+from fuzztypes.entity import open_source
+
+
+def write(path: Path, size: int):
+    with open_source(path, "wt") as fp:
+        for i in range(size):
+            data = dict(
+                value=f"Entity {i}",
+                aliases=[f"E{i}", f"Ent-{i}"],
+                label="thing",
+            )
+            fp.write(json.dumps(data) + "\n")
+
+
+def timed(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def read_all(path: Path):
+    with open_source(path) as fp:
+        while fp.read(1 << 20):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # read: decompression only, load: decompression, parsing, validation
+    header = f"{'file':>18} {'MB':>6} {'read s':>7} {'load s':>7} "
+    print(header + f"{'in MB/s':>8} {'read %':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for compression in ("", ".gz", ".bz2", ".xz"):
+            path = Path(tmp) / f"entities.jsonl{compression}"
+            write(path, args.size)
+
+            size_mb = os.path.getsize(path) / 1e6
+            read = timed(lambda: read_all(path))
+            load = timed(lambda: list(EntitySource(path)))
+            print(
+                f"{path.name:>18} {size_mb:>6.1f} {read:>7.2f} {load:>7.2f} "
+                f"{size_mb / read:>8.1f} {100 * read / load:>6.0f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
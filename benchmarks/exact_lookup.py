@@ -0,0 +1,77 @@
+"""
+Exact-lookup latency of on-disk tables with and without scalar indexes.
+
+Usage: python benchmarks/exact_lookup.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# tables are built in a scratch directory, not the user's FuzzHome
+os.environ.setdefault("FUZZTYPES_HOME", tempfile.mkdtemp())
+
+from fuzztypes import flags, on_disk  # noqa: E402
+
+
+def build(name: str, size: int, indexed: bool):
+    source = [(f"Entity {i}", f"E{i}") for i in range(size)]
+    storage = on_disk.StoredValidatorStorage(
+        name, source, search_flag=flags.AliasSearch
+    )
+
+    columns = on_disk.SCALAR_INDEX_COLUMNS
+    if not indexed:
+        on_disk.SCALAR_INDEX_COLUMNS = ()
+    try:
+        start = time.perf_counter()
+        storage.prepare(force_drop_table=True)
+        elapsed = time.perf_counter() - start
+    finally:
+        on_disk.SCALAR_INDEX_COLUMNS = columns
+
+    return storage, elapsed
+
+
+def measure(storage, size: int, lookups: int):
+    rng = random.Random(0)
+    keys = [f"entity {rng.randrange(size)}" for _ in range(lookups)]
+
+    timings = []
+    for key in keys:
+        start = time.perf_counter()
+        assert storage[key] is not None
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    return statistics.median(timings), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    header = f"{'rows':>10} {'index':>6} {'build s':>8} {'p50 ms':>8} "
+    print(header + f"{'p99 ms':>8}")
+
+    for size in args.sizes:
+        for indexed in (False, True):
+            name = f"Bench{size}{'Indexed' if indexed else ''}"
+            storage, elapsed = build(name, size, indexed)
+            p50, p99 = measure(storage, size, args.lookups)
+            flag = "yes" if indexed else "no"
+            print(
+                f"{size:>10} {flag:>6} {elapsed:>8.1f} {p50:>8.2f} {p99:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Load time of .jsonl entity files: per-line conversion (the previous reader)
+versus block validation in pydantic-core.
+
+Usage: python benchmarks/jsonl_load.py [--sizes 100000 1000000]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from fuzztypes import EntitySource, NamedEntity
+
+
+def write(path: Path, size: int):
+    with path.open("w") as fp:
+        for i in range(size):
+            data = dict(
+                value=f"Entity {i}",
+                aliases=[f"E{i}", f"Ent-{i}"],
+                label="thing",
+            )
+            fp.write(json.dumps(data) + "\n")
+
+
+def per_line(path: Path):
+    with path.open("r") as fp:
+        return [NamedEntity.convert(json.loads(line)) for line in fp]
+
+
+def timed(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'lines':>10} {'per-line s':>11} {'block s':>8} {'speedup':>8}")
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "entities.jsonl"
+            write(path, size)
+
+            slow = timed(lambda: per_line(path))
+            block = timed(lambda: list(EntitySource(path)))
+            speedup = slow / block
+            print(f"{size:>10} {slow:>11.2f} {block:>8.2f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Load time of .csv entity files parsed serially versus by a pool of worker
+processes (`workers`), which send their entities back as JSON validated
+again in the parent. That validation costs about 40% of a serial parse,
+which bounds the speedup to about 2.5x however many cores are used.
+
+Usage: python benchmarks/parallel_csv_load.py [--size 300000]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from fuzztypes import EntitySource
+
+
+def write(path: Path, size: int):
+    with path.open("w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["value", "label", "aliases"])
+        for i in range(size):
+            writer.writerow([f"Entity {i}", "thing", f"E{i}|Ent-{i}"])
+
+
+def timed(f) -> float:
+    start = time.perf_counter()
+    f()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.size:,} rows")
+    print(f"{'workers':>8} {'load s':>7} {'rows/s':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "entities.csv"
+        write(path, args.size)
+
+        for workers in args.workers:
+            source = EntitySource(path, workers=workers, parse_cache=False)
+            load = timed(lambda: list(source))
+            print(f"{workers:>8} {load:>7.2f} {args.size / load:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,7 @@ from . import utils
 from . import lazy
 
 # Schema
-from .entity import Entity, NamedEntity, EntitySource
+from .entity import CompactEntity, Entity, NamedEntity, EntitySource
 from .match import Match, MatchResult, Record
 
 # Validation
@@ -28,6 +28,11 @@ from .validation import (
 )
 
 # Named Entity Storage
+from . import pool
+from . import cache
+from .cache import ResolutionCache
+from . import bundle
+from . import codec
 from . import storage
 from .in_memory import InMemoryValidator
 from .on_disk import OnDiskValidator
@@ -54,6 +59,7 @@ from .regex import Email, SSN, ZipCode
 
 __all__ = (
     "ASCII",
+    "CompactEntity",
     "Date",
     "Email",
     "Emoji",
@@ -75,6 +81,7 @@ __all__ = (
     "OnDiskValidator",
     "Person",
     "Record",
+    "ResolutionCache",
     "RegexValidator",
     "SSN",
     "Date",
@@ -83,11 +90,15 @@ __all__ = (
     "DatetimeValidator",
     "Vibemoji",
     "ZipCode",
+    "bundle",
+    "cache",
+    "codec",
     "const",
     "flags",
     "get_type_adapter",
     "lazy",
     "logger",
+    "pool",
     "utils",
     "resolve_entity",
     "validate_json",
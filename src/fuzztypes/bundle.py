@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+from typing import Optional
+
+import fuzztypes
+from fuzztypes import logger, pool
+
+# Version of the bundle layout, bumped on incompatible changes.
+# A bundle is a gzipped tarball of a manifest (bundle.json) and the table's
+# Lance dataset directory (indexes, trigrams and metadata included).
+BundleFormat = 1
+ManifestName = "bundle.json"
+TableDirName = "table"
+
+
+def export_table(
+    name: str,
+    bundle_path: str,
+    path: Optional[str] = None,
+) -> dict:
+    """
+    Exports a prepared on-disk table as a portable bundle.
+
+    :param name: Table name
+    :param bundle_path: Path of the bundle (.tar.gz) to write.
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :return: Manifest written into the bundle.
+    """
+    assert name in pool.table_names(path), f"Table not found: {name}"
+
+    manifest = dict(
+        format=BundleFormat,
+        name=name,
+        fingerprint=pool.get_metadata(name, path).get("fingerprint"),
+        version=fuzztypes.__version__,
+    )
+    data = json.dumps(manifest, indent=2).encode("utf-8")
+
+    temp_path = f"{bundle_path}.tmp"
+    with tarfile.open(temp_path, "w:gz") as tar:
+        info = tarfile.TarInfo(ManifestName)
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+        tar.add(pool.table_path(name, path), arcname=TableDirName)
+    os.replace(temp_path, bundle_path)
+
+    return manifest
+
+
+def read_manifest(bundle_path: str) -> dict:
+    """
+    Reads the manifest of a bundle.
+
+    :param bundle_path: Path of the bundle (.tar.gz)
+    :return: Manifest (format, name, fingerprint, version)
+    """
+    with tarfile.open(bundle_path, "r:gz") as tar:
+        fp = tar.extractfile(ManifestName)
+        assert fp is not None, f"Manifest not found: {bundle_path}"
+        return json.load(fp)
+
+
+def import_table(
+    bundle_path: str,
+    name: Optional[str] = None,
+    path: Optional[str] = None,
+    fingerprint: Optional[str] = None,
+) -> dict:
+    """
+    Imports a bundle as an on-disk table, replacing any existing table.
+
+    :param bundle_path: Path of the bundle (.tar.gz)
+    :param name: Table name (default: name of the exported table)
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :param fingerprint: Expected fingerprint, ValueError if different.
+    :return: Manifest of the imported bundle.
+    """
+    manifest = read_manifest(bundle_path)
+    name = name or manifest["name"]
+
+    if manifest.get("format") != BundleFormat:
+        raise ValueError(
+            f"Unsupported bundle format {manifest.get('format')}: "
+            f"{bundle_path}"
+        )
+
+    if fingerprint is not None and manifest["fingerprint"] != fingerprint:
+        raise ValueError(
+            f"Bundle fingerprint {manifest['fingerprint']} does not match "
+            f"{fingerprint}: {bundle_path}"
+        )
+
+    table_path = pool.table_path(name, path)
+    temp_path = f"{table_path}.import"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    with tarfile.open(bundle_path, "r:gz") as tar:
+        prefix = f"{TableDirName}/"
+        members = []
+        for member in tar.getmembers():
+            parts = member.name.split("/")
+            is_safe = member.isfile() or member.isdir()
+            if not is_safe or ".." in parts or os.path.isabs(member.name):
+                raise ValueError(f"Unsafe bundle member: {member.name}")
+            if member.name.startswith(prefix):
+                members.append(member)
+        # use the "data" extraction filter when available (3.12+)
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(temp_path, members=members, filter="data")
+        else:
+            tar.extractall(temp_path, members=members)
+
+    with pool.table_lock(name, path):
+        shutil.rmtree(table_path, ignore_errors=True)
+        os.replace(os.path.join(temp_path, TableDirName), table_path)
+        pool.forget_table(name, path)
+
+    shutil.rmtree(temp_path, ignore_errors=True)
+    logger.info(f"Imported bundle {bundle_path} as table {name}")
+
+    return manifest
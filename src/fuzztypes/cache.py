@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fuzztypes import const
+
+# Cached outcome of a lookup: JSON of the chosen entity (None if not found),
+# its score, and the near misses (value, score) of not-found outcomes.
+CachedResolution = Tuple[Optional[str], Optional[float], List[list]]
+
+# Number of writes between two evictions of expired and excess entries.
+EVICT_EVERY = 1_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolutions (
+    storage TEXT NOT NULL,
+    key TEXT NOT NULL,
+    entity TEXT,
+    score REAL,
+    near TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (storage, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resolutions_created ON resolutions (created);
+"""
+
+
+class ResolutionCache:
+    """
+    Persistent cache of lookup outcomes shared across processes, stored in
+    a SQLite database in WAL mode (concurrent readers and writers).
+
+    Entries are keyed by storage identity, which changes whenever the
+    storage's data or configuration changes, and key (normalized unless
+    the storage searches case-exact terms).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 7 * 24 * 3600,
+        max_entries: Optional[int] = 1_000_000,
+    ):
+        """
+        :param path: SQLite file (default: const.ResolutionCachePath)
+        :param ttl: Seconds before an entry expires (None: never).
+        :param max_entries: Entries kept, oldest evicted first (None: all).
+        """
+        self.path = path or const.ResolutionCachePath
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._local = threading.local()
+        self._writes = 0
+
+    def __getstate__(self) -> dict:
+        # connections are per thread and process, reopened when unpickled
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # sqlite connections are per thread (and per process)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(
+        self, storage: str, keys: Iterable[str]
+    ) -> Dict[str, CachedResolution]:
+        """
+        Reads the cached outcomes of keys, ignoring expired entries.
+
+        :param storage: Storage identity.
+        :param keys: Keys, see `AbstractStorage.cache_key`.
+        :return: Cached outcome of each key found.
+        """
+        keys = list(dict.fromkeys(keys))
+        min_created = 0.0 if self.ttl is None else time.time() - self.ttl
+
+        found: Dict[str, CachedResolution] = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            marks = ", ".join("?" * len(chunk))
+            rows = self.conn.execute(
+                "SELECT key, entity, score, near FROM resolutions "
+                f"WHERE storage = ? AND key IN ({marks}) AND created >= ?",
+                [storage, *chunk, min_created],
+            )
+            for key, entity, score, near in rows:
+                found[key] = (entity, score, json.loads(near or "[]"))
+        return found
+
+    def put_many(
+        self, storage: str, items: Dict[str, CachedResolution]
+    ) -> None:
+        """
+        Stores the outcomes of keys, replacing existing entries.
+
+        :param storage: Storage identity.
+        :param items: Outcome of each key.
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows: List[Any] = [
+            (storage, key, entity, score, json.dumps(near), now)
+            for key, (entity, score, near) in items.items()
+        ]
+        with self.conn as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO resolutions "
+                "(storage, key, entity, score, near, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        self._writes += len(rows)
+        if self._writes >= EVICT_EVERY:
+            self._writes = 0
+            self.evict()
+
+    def delete(self, storage: str, keys: Iterable[str]) -> None:
+        """
+        Deletes the outcomes of keys, e.g. when they are learned as aliases.
+
+        :param storage: Storage identity.
+        :param keys: Keys, see `AbstractStorage.cache_key`.
+        """
+        keys = list(dict.fromkeys(keys))
+        with self.conn as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                marks = ", ".join("?" * len(chunk))
+                conn.execute(
+                    "DELETE FROM resolutions "
+                    f"WHERE storage = ? AND key IN ({marks})",
+                    [storage, *chunk],
+                )
+
+    def evict(self) -> None:
+        """Deletes expired entries, then the oldest entries past the cap."""
+        with self.conn as conn:
+            if self.ttl is not None:
+                conn.execute(
+                    "DELETE FROM resolutions WHERE created < ?",
+                    [time.time() - self.ttl],
+                )
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM resolutions WHERE created <= ("
+                    "SELECT created FROM resolutions "
+                    "ORDER BY created DESC LIMIT 1 OFFSET ?)",
+                    [self.max_entries],
+                )
+
+    def clear(self) -> None:
+        with self.conn as conn:
+            conn.execute("DELETE FROM resolutions")
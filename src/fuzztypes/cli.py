@@ -0,0 +1,82 @@
+import argparse
+import os
+from typing import List, Optional, get_args
+
+import fuzztypes
+from fuzztypes import FuzzValidator, bundle, on_disk
+
+
+def get_storage(name: str) -> Optional[on_disk.StoredValidatorStorage]:
+    """
+    Returns the on-disk storage of a usable type (e.g. Emoji, LanguageName).
+
+    :param name: Name of a type exported by fuzztypes.
+    :return: Storage if the type is backed by an OnDiskValidator.
+    """
+    annotation = getattr(fuzztypes, name, None)
+    for item in get_args(annotation):
+        if isinstance(item, FuzzValidator):
+            if isinstance(item.func, on_disk.StoredValidatorStorage):
+                return item.func
+    return None
+
+
+def export_bundles(names: List[str], output: str) -> List[str]:
+    """
+    Exports tables as bundles, building the tables of usable types first.
+
+    :param names: Usable type names (e.g. Vibemoji) or table names.
+    :param output: Directory where bundles are written.
+    :return: Paths of the bundles written.
+    """
+    os.makedirs(output, exist_ok=True)
+
+    table_names = []
+    for name in names:
+        storage = get_storage(name)
+        if storage is not None:
+            storage.prepare_if_necessary()
+            name = storage.name
+        if name not in table_names:
+            table_names.append(name)
+
+    bundle_paths = []
+    for name in table_names:
+        bundle_path = os.path.join(output, f"{name}.tar.gz")
+        bundle.export_table(name, bundle_path)
+        bundle_paths.append(bundle_path)
+    return bundle_paths
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="fuzztypes",
+        description="Export and import prebuilt on-disk tables.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser(
+        "export", help="Export tables as portable bundles."
+    )
+    export_parser.add_argument(
+        "names", nargs="+", help="Usable types (e.g. Emoji) or table names."
+    )
+    export_parser.add_argument(
+        "-o", "--output", default=".", help="Output directory."
+    )
+
+    import_parser = commands.add_parser(
+        "import", help="Import bundles as on-disk tables."
+    )
+    import_parser.add_argument("bundles", nargs="+", help="Bundle paths.")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for bundle_path in export_bundles(args.names, args.output):
+            print(bundle_path)
+
+    elif args.command == "import":
+        for bundle_path in args.bundles:
+            manifest = bundle.import_table(bundle_path)
+            print(f"{bundle_path} -> {manifest['name']}")
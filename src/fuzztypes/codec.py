@@ -0,0 +1,146 @@
+import json
+import types
+from enum import Enum
+from functools import lru_cache
+from inspect import isclass
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import TypeAdapter
+
+from fuzztypes import NamedEntity, lazy
+
+# How an entity field is stored in the Arrow struct column:
+# scalar: native Arrow type (str, int, float, bool and lists of those)
+# enum: Enum value stored natively, converted back to the Enum on read
+# json: anything else, stored as a JSON string and validated on read
+FieldKind = str
+
+
+def unwrap_optional(annotation: Any) -> Any:
+    """Returns X for Optional[X] (or X | None), else the annotation."""
+    origin = get_origin(annotation)
+    if origin is Union or origin is getattr(types, "UnionType", None):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def field_kind(annotation: Any) -> Tuple[FieldKind, Any]:
+    """
+    Derives how a field is stored from its type annotation.
+
+    :param annotation: Type annotation of a pydantic model field.
+    :return: Field kind and Arrow data type.
+    """
+    pa = lazy.lazy_import("pyarrow")
+    scalars = {
+        str: pa.string(),
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+    }
+
+    annotation = unwrap_optional(annotation)
+
+    if annotation in scalars:
+        return "scalar", scalars[annotation]
+
+    if isclass(annotation) and issubclass(annotation, Enum):
+        value_types = {type(member.value) for member in annotation}
+        if len(value_types) == 1:
+            (value_type,) = value_types
+            if value_type in scalars:
+                return "enum", scalars[value_type]
+
+    if get_origin(annotation) in (list, List):
+        args = get_args(annotation)
+        if len(args) == 1 and args[0] in scalars:
+            return "scalar", pa.list_(scalars[args[0]])
+
+    return "json", pa.string()
+
+
+class EntityCodec:
+    """
+    Converts entities to and from the fields of an Arrow struct column
+    derived from the entity type's model fields. Decoding uses
+    `model_construct`, skipping validation of values read from the table.
+    """
+
+    def __init__(self, entity_type: Type[NamedEntity]):
+        pa = lazy.lazy_import("pyarrow")
+
+        self.entity_type = entity_type
+        self.kinds: Dict[str, FieldKind] = {}
+        self.annotations: Dict[str, Any] = {}
+
+        arrow_fields = []
+        for name, field in entity_type.model_fields.items():
+            kind, arrow_type = field_kind(field.annotation)
+            self.kinds[name] = kind
+            self.annotations[name] = unwrap_optional(field.annotation)
+            arrow_fields.append(pa.field(name, arrow_type))
+
+        self.arrow_type = pa.struct(arrow_fields)
+        self._adapters: Dict[str, TypeAdapter] = {}
+
+    def adapter(self, name: str) -> TypeAdapter:
+        adapter = self._adapters.get(name)
+        if adapter is None:
+            # built at runtime, hence typed Any rather than a type expression
+            annotation: Any = Optional.__getitem__(self.annotations[name])
+            adapter = self._adapters[name] = TypeAdapter(annotation)
+        return adapter
+
+    def encode(self, entity: NamedEntity) -> Dict[str, Any]:
+        """
+        Converts an entity into the values of the struct column.
+
+        :param entity: Entity of the codec's entity type.
+        :return: Dictionary of field name to Arrow-compatible value.
+        """
+        data = entity.model_dump(mode="json")
+        for name, kind in self.kinds.items():
+            value = data.get(name)
+            if kind == "json" and value is not None:
+                data[name] = json.dumps(value)
+        return data
+
+    def decode(self, data: Union[Dict[str, Any], str]) -> NamedEntity:
+        """
+        Converts a struct column value back into an entity.
+
+        :param data: Struct value, or JSON string of tables created before
+                     entities were stored as struct columns.
+        :return: Entity of the codec's entity type.
+        """
+        if isinstance(data, str):
+            return self.entity_type.model_validate_json(data)
+
+        values = {}
+        for name, kind in self.kinds.items():
+            value = data.get(name)
+            if value is not None:
+                if kind == "enum":
+                    value = self.annotations[name](value)
+                elif kind == "json":
+                    value = self.adapter(name).validate_json(value)
+            values[name] = value
+
+        return self.entity_type.model_construct(**values)
+
+
+@lru_cache(maxsize=None)
+def get_codec(entity_type: Type[NamedEntity]) -> EntityCodec:
+    return EntityCodec(entity_type)
@@ -6,6 +6,8 @@ FuzzHome = "~/.local/fuzztypes/"
 FuzzHome = os.path.expanduser(os.environ.get("FUZZTYPES_HOME", FuzzHome))
 StoredValidatorPath = os.path.join(FuzzHome, "on_disk")
 DownloadsPath = os.path.join(FuzzHome, "downloads")
+ResolutionCachePath = os.path.join(FuzzHome, "resolutions.sqlite3")
+ParseCachePath = os.path.join(FuzzHome, "sources")
 
 # Default encoder to use when generating semantic embeddings.
 # Override with environment variable `FUZZTYPES_DEFAULT_ENCODER`.
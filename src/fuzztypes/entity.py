@@ -1,20 +1,44 @@
+import bz2
 import csv
+import gc
+import gzip
+import hashlib
+import io
 import json
+import lzma
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
+from itertools import islice, repeat
 from pathlib import Path
 from typing import (
+    Iterable,
+    Iterator,
     List,
     Union,
     Type,
     Any,
     Optional,
+    Sequence,
     Tuple,
     Callable,
+    Dict,
+    FrozenSet,
+    Set,
     Generic,
+    IO,
+    cast,
     TypeVar,
+    get_origin,
 )
 
 from pydantic import BaseModel, Field, TypeAdapter
 
+from fuzztypes import const, lazy, logger
+
 T = TypeVar("T")
 
 
@@ -102,31 +126,210 @@ class NamedEntity(Entity):
 
 NamedEntityAdapter = TypeAdapter(NamedEntity)
 
+
+class CompactEntity:
+    """
+    Compact, immutable form of an entity held inside storages: the values
+    of the entity type's fields in a tuple (lists stored as tuples), without
+    pydantic's per-instance dict and fields-set tracking.
+
+    Fields and `meta` keys are readable as attributes. `materialize`
+    rebuilds the entity with `model_construct`, skipping validation since
+    the values were validated when the source was read.
+    """
+
+    __slots__ = ("entity_type", "data")
+
+    entity_type: Type[NamedEntity]
+    data: tuple
+
+    def __init__(self, entity_type: Type[NamedEntity], data: tuple):
+        object.__setattr__(self, "entity_type", entity_type)
+        object.__setattr__(self, "data", data)
+
+    @classmethod
+    def from_entity(
+        cls, entity: Union[NamedEntity, "CompactEntity"]
+    ) -> "CompactEntity":
+        if isinstance(entity, CompactEntity):
+            return entity
+
+        entity_type = type(entity)
+        names, _, lists = compact_layout(entity_type)
+        data = []
+        for name in names:
+            value = getattr(entity, name)
+            if name in lists and isinstance(value, list):
+                value = tuple(value)
+            data.append(value)
+        return cls(entity_type, tuple(data))
+
+    def materialize(self) -> NamedEntity:
+        """Full entity of the entity type, built without validation."""
+        names, _, lists = compact_layout(self.entity_type)
+        values = {}
+        for name, value in zip(names, self.data):
+            if name in lists and isinstance(value, tuple):
+                value = list(value)
+            values[name] = value
+        return self.entity_type.model_construct(**values)
+
+    def __getattr__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            _, positions, _ = compact_layout(self.entity_type)
+            if key in positions:
+                return self.data[positions[key]]
+
+            meta = self.data[positions["meta"]]
+            if meta is not None and key in meta:
+                return meta[key]
+
+        raise AttributeError(
+            f"{self.__class__.__name__!r} object has no attribute {key!r}"
+        )
+
+    def __setattr__(self, key: str, value: Any):
+        raise AttributeError(f"{self.__class__.__name__!r} is immutable")
+
+    def __delattr__(self, key: str):
+        raise AttributeError(f"{self.__class__.__name__!r} is immutable")
+
+    def __reduce__(self):
+        return self.__class__, (self.entity_type, self.data)
+
+    def __eq__(self, other: Any):
+        other = getattr(other, "value", other)
+        return self.value == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __repr__(self):
+        name = self.entity_type.__name__
+        return f"{self.__class__.__name__}({name}, value={self.value!r})"
+
+
+@lru_cache(maxsize=None)
+def compact_layout(
+    entity_type: Type[NamedEntity],
+) -> Tuple[Tuple[str, ...], Dict[str, int], FrozenSet[str]]:
+    """
+    Layout of the compact form of an entity type.
+
+    :param entity_type: Entity type (NamedEntity or a subclass).
+    :return: Field names in order, position of each field, and the names
+             of the list fields (stored as tuples).
+    """
+    fields = entity_type.model_fields
+    names = tuple(fields)
+    positions = {name: index for index, name in enumerate(names)}
+    lists = frozenset(
+        name
+        for name, field in fields.items()
+        if list in (field.annotation, get_origin(field.annotation))
+    )
+    return names, positions, lists
+
+
 SourceType = Union[Path, tuple["EntitySource", str], Callable]
 
+# Entities read (and validated) at a time when streaming a source.
+ChunkSize = 10_000
+
+# Compressed file extensions, decompressed while streaming (e.g. .jsonl.gz).
+Compressions = ("gz", "bz2", "xz", "zst")
+
+# Text file formats, parsed once and then read from the parse cache.
+TextFormats = ("csv", "tsv", "txt", "jsonl")
+
+# Version of the parse cache files, part of their key.
+ParseCacheFormat = 1
+
+# Columnar file formats, read as Arrow record batches.
+ColumnarFormats = ("parquet", "arrow", "feather")
+
+# NamedEntity fields read from the columns of columnar files.
+Fields = ("value", "aliases", "label", "priority")
+
 
 class EntitySource:
-    def __init__(self, source: SourceType, mv_splitter: str = "|"):
+    def __init__(
+        self,
+        source: SourceType,
+        mv_splitter: str = "|",
+        stream: bool = False,
+        chunk_size: int = ChunkSize,
+        columns: Optional[Dict[str, str]] = None,
+        meta_columns: Optional[List[str]] = None,
+        workers: int = 1,
+        parse_cache: bool = True,
+    ):
+        """
+        :param source: Path of a .csv, .tsv, .jsonl, .txt, .parquet or
+                       .arrow/.feather file, callable returning entities, or
+                       (parent source, label) tuple.
+        :param mv_splitter: Separator of aliases in .csv and .tsv files
+                            (and in string alias columns).
+        :param stream: Read entities lazily each time the source is
+                       iterated, rather than holding them all in memory.
+        :param chunk_size: Entities read and validated at a time.
+        :param columns: Columns of .parquet and .arrow files holding the
+                        value, aliases, label and priority of entities,
+                        keyed by field (defaults to the field names).
+        :param meta_columns: Columns of .parquet and .arrow files stored
+                             in the meta of entities.
+        :param workers: Processes parsing .csv, .tsv and .txt files in
+                        parallel, split in byte ranges at line boundaries
+                        (rows can't span several lines).
+        :param parse_cache: Cache the validated entities of .csv, .tsv,
+                            .txt and .jsonl files under FuzzHome, reused
+                            until the file changes.
+        """
         self.loaded: bool = False
         self.source: SourceType = source
         self.mv_splitter: str = mv_splitter
-        self.entities: List[NamedEntity] = []
+        self.stream: bool = stream
+        self.chunk_size: int = chunk_size
+        self.columns: Dict[str, str] = columns or {}
+        self.meta_columns: List[str] = meta_columns or []
+        self.workers: int = workers
+        self.parse_cache: bool = parse_cache
+        self.entities: Sequence[NamedEntity] = []
+
+        # label sub-sources, see `label_entities`
+        self._label_index: Optional[Dict[Optional[str], List[int]]] = None
+
+        # streamed sources: labels requested by sub-sources, and entities of
+        # the requested labels grouped by a scan but not yet handed over
+        self._label_requests: Set[Optional[str]] = set()
+        self._label_groups: Dict[Optional[str], List[NamedEntity]] = {}
 
     def __len__(self):
+        if self.stream and not self.loaded:
+            return sum(len(chunk) for chunk in self.iter_chunks())
         self._load_if_necessary()
         return len(self.entities)
 
     def __getitem__(
         self, key: Union[int, slice, str]
-    ) -> Union[NamedEntity, list[NamedEntity], "EntitySource"]:
+    ) -> Union[NamedEntity, Sequence[NamedEntity], "EntitySource"]:
         if isinstance(key, str):
+            if self.stream:
+                self._label_requests.add(key)
+
             # return another shell, let loading occur on demand.
-            return EntitySource(source=(self, key))
+            return EntitySource(
+                source=(self, key),
+                stream=self.stream,
+                chunk_size=self.chunk_size,
+            )
 
         self._load_if_necessary()
         return self.entities[key]
 
-    def __iter__(self):
+    def __iter__(self) -> Iterator[NamedEntity]:
+        if self.stream and not self.loaded:
+            return (e for chunk in self.iter_chunks() for e in chunk)
         self._load_if_necessary()
         return iter(self.entities)
 
@@ -135,24 +338,295 @@ class EntitySource:
             self.loaded = True
             if isinstance(self.source, tuple):
                 parent, label = self.source
-                self.entities = [e for e in parent if e.label == label]
+                self.entities = parent.label_entities(label)
 
             elif callable(self.source):
                 self.entities = self.source()
-
-            elif isinstance(self.source, Path):
-                dialects = {
-                    "csv": self.from_csv,
-                    "tsv": self.from_tsv,
-                    "jsonl": self.from_jsonl,
-                    "txt": self.from_txt,
+            else:
+                with paused_gc():
+                    self.entities = [
+                        entity
+                        for chunk in self.iter_chunks()
+                        for entity in chunk
+                    ]
+
+    def label_entities(self, label: Optional[str]) -> Sequence[NamedEntity]:
+        """
+        Entities of a label sub-source. The labels are indexed by a single
+        pass over the source, on first access, and the entities are shared
+        with the sub-sources rather than copied.
+
+        Streamed sources don't keep their entities: a pass groups those of
+        the labels requested so far (by `source[label]`), and each group is
+        handed over to the first sub-source reading it. A sub-source read
+        again (or requested later) takes another pass.
+
+        :param label: Label of the entities.
+        :return: View of the source's entities (grouped entities if the
+                 source is streamed).
+        """
+        if self.stream and not self.loaded:
+            if label not in self._label_groups:
+                labels = self._label_requests | {label}
+                groups: Dict[Optional[str], List[NamedEntity]] = {
+                    name: [] for name in labels
                 }
-                _, ext = self.source.name.lower().rsplit(".", maxsplit=1)
-                f = dialects.get(ext)
-                assert f is not None, f"No reader found for: {ext}"
+                with paused_gc():
+                    for entity in self:
+                        group = groups.get(entity.label)
+                        if group is not None:
+                            group.append(entity)
+                self._label_groups.update(groups)
+                self._label_requests.clear()
+            return self._label_groups.pop(label)
+
+        self._load_if_necessary()
+        if self._label_index is None:
+            index: Dict[Optional[str], List[int]] = defaultdict(list)
+            for i, entity in enumerate(self.entities):
+                index[entity.label].append(i)
+            self._label_index = dict(index)
+        return EntityView(self.entities, self._label_index.get(label, []))
+
+    def iter_chunks(self) -> Iterator[List[NamedEntity]]:
+        """
+        Reads the source in chunks of (at most) `chunk_size` entities.
 
+        :return: Iterator of lists of validated entities.
+        """
+        if isinstance(self.source, tuple):
+            parent, label = self.source
+            entities = parent.label_entities(label)
+            yield from chunked(entities, self.chunk_size)
+
+        elif callable(self.source):
+            yield from chunked(self.source(), self.chunk_size)
+
+        elif isinstance(self.source, Path):
+            readers: Dict[str, Callable[..., Iterator[List[NamedEntity]]]] = {
+                "csv": self.iter_csv,
+                "tsv": self.iter_tsv,
+                "jsonl": partial(self.iter_jsonl, chunk_size=self.chunk_size),
+                "txt": self.iter_txt,
+                "parquet": self.iter_columnar,
+                "arrow": self.iter_columnar,
+                "feather": self.iter_columnar,
+            }
+            f = readers.get(self.ext or "")
+            assert f is not None, f"No reader found for: {self.ext}"
+
+            if self.parse_cache and self.ext in TextFormats:
+                yield from self.iter_cached(f)
+            else:
                 # noinspection PyArgumentList
-                self.entities = f(self.source)
+                yield from f(self.source)
+
+    @property
+    def cache_path(self) -> str:
+        """Parse cache file of a Path source."""
+        assert isinstance(self.source, Path)
+        key = f"{self.source.resolve()}|{self.mv_splitter}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(const.ParseCachePath, f"{digest}.jsonl")
+
+    @property
+    def cache_key(self) -> bytes:
+        """Identifies the version of the file cached (size and mtime)."""
+        assert isinstance(self.source, Path)
+        stat = self.source.stat()
+        key = dict(
+            format=ParseCacheFormat,
+            path=str(self.source.resolve()),
+            size=stat.st_size,
+            mtime=stat.st_mtime_ns,
+            mv_splitter=self.mv_splitter,
+        )
+        return json.dumps(key, sort_keys=True).encode("utf-8") + b"\n"
+
+    def iter_cached(self, reader: Callable) -> Iterator[List[NamedEntity]]:
+        """
+        Reads the validated entities of the parse cache, skipping the
+        parsing of the source file. If the file has changed (or isn't
+        cached), it is parsed by reader and cached as it is read.
+
+        The cache stores a JSON array of entities per chunk, validated in
+        a single pydantic-core call when read.
+        """
+        path, key = self.cache_path, self.cache_key
+
+        if os.path.exists(path):
+            with open(path, "rb") as fp:
+                if fp.readline() == key:
+                    for block in fp:
+                        with paused_gc():
+                            chunk = NamedEntityListAdapter.validate_json(block)
+                        yield from chunked(chunk, self.chunk_size)
+                    return
+
+        # cache is skipped (with a warning) if it can't be written,
+        # e.g. when FuzzHome is read-only
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        out: Optional[IO[bytes]] = None
+        try:
+            try:
+                os.makedirs(const.ParseCachePath, exist_ok=True)
+                out = open(temp_path, "wb")
+                out.write(key)
+            except OSError as e:
+                self.skip_cache(out, e)
+                out = None
+
+            for chunk in reader(self.source):
+                if out is not None:
+                    block = NamedEntityListAdapter.dump_json(
+                        chunk, exclude_defaults=True
+                    )
+                    try:
+                        out.write(block + b"\n")
+                    except OSError as e:
+                        self.skip_cache(out, e)
+                        out = None
+                yield chunk
+
+            if out is not None:
+                try:
+                    out.close()
+                    os.replace(temp_path, path)
+                except OSError as e:
+                    self.skip_cache(None, e)
+        finally:
+            if out is not None:
+                out.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def skip_cache(self, out: Optional[IO[bytes]], error: OSError) -> None:
+        logger.warning(f"Parse cache of {self.source} not written: {error}")
+        if out is not None:
+            out.close()
+
+    @property
+    def ext(self) -> Optional[str]:
+        """
+        File format of a Path source, ignoring the compression extension
+        (e.g. jsonl for terms.jsonl.gz). None for other sources.
+        """
+        if isinstance(self.source, Path):
+            exts = self.source.name.lower().split(".")[1:]
+            if exts and exts[-1] in Compressions:
+                exts = exts[:-1]
+            return exts[-1] if exts else ""
+        return None
+
+    @property
+    def is_columnar(self) -> bool:
+        """Whether the source is a .parquet or .arrow/.feather file."""
+        return self.ext in ColumnarFormats
+
+    def iter_batches(self) -> Iterator[Any]:
+        """
+        Reads a .parquet or .arrow/.feather file in Arrow record batches of
+        (at most) `chunk_size` rows, with value, aliases (list of strings),
+        label and priority columns, followed by the meta columns.
+
+        :return: Iterator of pyarrow RecordBatch objects.
+        """
+        pa = lazy.lazy_import("pyarrow")
+        assert isinstance(self.source, Path) and self.is_columnar
+
+        names = {field: self.columns.get(field, field) for field in Fields}
+        if self.ext == "parquet":
+            pq = lazy.lazy_import("pyarrow.parquet")
+            source: Any = self.source
+            if is_compressed(source):
+                source = open_source(source, "rb")
+            parquet = pq.ParquetFile(source)
+            available = set(parquet.schema_arrow.names)
+            needed = [c for c in names.values() if c in available]
+            batches = parquet.iter_batches(
+                batch_size=self.chunk_size,
+                columns=needed + self.meta_columns,
+            )
+        else:
+            if is_compressed(self.source):
+                with open_source(self.source, "rb") as fp:
+                    data = pa.py_buffer(fp.read())
+            else:
+                # memory mapped, record batches are read without copying
+                data = pa.memory_map(str(self.source))
+            reader = pa.ipc.open_file(data)
+            available = set(reader.schema.names)
+            batches = iter_ipc_batches(reader, self.chunk_size)
+
+        assert names["value"] in available, f"No column: {names['value']}"
+        for batch in batches:
+            yield self.normalize_batch(batch, names)
+
+    def normalize_batch(self, batch: Any, names: Dict[str, str]) -> Any:
+        """Renames and casts the columns of a batch to the entity fields."""
+        pa = lazy.lazy_import("pyarrow")
+
+        def column(field: str, arrow_type: Any) -> Any:
+            name = names[field]
+            if name not in batch.schema.names:
+                return pa.nulls(batch.num_rows, arrow_type)
+            return batch.column(name).cast(arrow_type)
+
+        arrays = [
+            column("value", pa.string()),
+            self.alias_lists(batch, names["aliases"]),
+            column("label", pa.string()),
+            column("priority", pa.int64()),
+        ]
+        arrays += [batch.column(name) for name in self.meta_columns]
+        return pa.RecordBatch.from_arrays(
+            arrays, names=list(Fields) + self.meta_columns
+        )
+
+    def alias_lists(self, batch: Any, name: str) -> Any:
+        """Aliases column as lists of non-empty strings."""
+        pa = lazy.lazy_import("pyarrow")
+        pc = lazy.lazy_import("pyarrow.compute")
+        np = lazy.lazy_import("numpy")
+
+        list_type = pa.list_(pa.string())
+        if name not in batch.schema.names:
+            offsets = pa.array(np.zeros(batch.num_rows + 1), pa.int32())
+            return pa.ListArray.from_arrays(offsets, pa.array([], pa.string()))
+
+        aliases = batch.column(name)
+        if pa.types.is_string(aliases.type):
+            # delimited string, split using mv_splitter
+            aliases = pc.fill_null(aliases, "")
+            aliases = pc.split_pattern(aliases, self.mv_splitter)
+        aliases = aliases.cast(list_type)
+
+        # drop empty and null aliases (null lists have no aliases)
+        flat = pc.list_flatten(aliases)
+        parents = pc.list_parent_indices(aliases)
+        keep = pc.fill_null(pc.not_equal(flat, ""), False)
+        parents = pc.filter(parents, keep).to_numpy(zero_copy_only=False)
+        counts = np.bincount(parents, minlength=batch.num_rows)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        return pa.ListArray.from_arrays(
+            pa.array(offsets, pa.int32()), pc.filter(flat, keep)
+        )
+
+    def iter_columnar(self, path: Path) -> Iterator[List[NamedEntity]]:
+        """
+        Reads a .parquet or .arrow/.feather file, validating `chunk_size`
+        rows at a time.
+
+        :param path: Path object pointing to the .parquet or .arrow file.
+        :return: Iterator of lists of Entities
+        """
+        for batch in self.iter_batches():
+            rows = batch.to_pylist()
+            if self.meta_columns:
+                for row in rows:
+                    meta = {name: row.pop(name) for name in self.meta_columns}
+                    row["meta"] = meta
+            yield NamedEntityListAdapter.validate_python(rows)
 
     @classmethod
     def from_jsonl(cls, path: Path) -> List[NamedEntity]:
@@ -162,12 +636,25 @@ class EntitySource:
         :param path: Path object pointing to the .jsonl file.
         :return: List of Entities.
         """
-        entities = []
-        with path.open("r") as fp:
-            for line in fp:
-                entity = NamedEntity.convert(json.loads(line))
-                entities.append(entity)
-        return entities
+        return [e for chunk in cls.iter_jsonl(path) for e in chunk]
+
+    @classmethod
+    def iter_jsonl(
+        cls, path: Path, chunk_size: int = ChunkSize
+    ) -> Iterator[List[NamedEntity]]:
+        """
+        Reads a .jsonl file, parsing and validating `chunk_size` lines at a
+        time with a single pydantic-core call.
+
+        :param path: Path object pointing to the .jsonl file.
+        :param chunk_size: Lines parsed and validated at a time.
+        :return: Iterator of lists of Entities.
+        """
+        with open_source(path) as fp:
+            for lines in chunked(fp, chunk_size):
+                lines = [line for line in lines if line.strip()]
+                if lines:
+                    yield parse_jsonl_block(lines)
 
     def from_csv(self, path: Path) -> List[NamedEntity]:
         return self.from_sv(path, csv.excel)
@@ -192,14 +679,228 @@ class EntitySource:
         :param fieldnames: Specify header if not provided (e.g. .txt mode)
         :return: List of Entities
         """
+        chunks = self.iter_sv(path, dialect, fieldnames=fieldnames)
+        return [e for chunk in chunks for e in chunk]
+
+    def iter_csv(self, path: Path) -> Iterator[List[NamedEntity]]:
+        return self.iter_sv(path, csv.excel)
+
+    def iter_tsv(self, path: Path) -> Iterator[List[NamedEntity]]:
+        return self.iter_sv(path, csv.excel_tab)
+
+    def iter_txt(self, path: Path) -> Iterator[List[NamedEntity]]:
+        return self.iter_sv(path, csv.excel, fieldnames=["value"])
+
+    def iter_sv(
+        self,
+        path: Path,
+        dialect: Type[csv.Dialect],
+        fieldnames=None,
+    ) -> Iterator[List[NamedEntity]]:
+        """
+        Reads a .csv or .tsv file, validating `chunk_size` rows at a time.
 
-        def fix(d):
-            aliases = d.get("aliases", "").split(self.mv_splitter)
-            d["aliases"] = list(filter(None, aliases))
-            return d
+        :param path: Path object pointing to the .csv or .tsv file.
+        :param dialect: CSV or TSV excel-based dialect.
+        :param fieldnames: Specify header if not provided (e.g. .txt mode)
+        :return: Iterator of lists of Entities
+        """
+        if self.workers > 1 and not is_compressed(path):
+            yield from self.iter_sv_parallel(path, dialect, fieldnames)
+            return
 
-        with path.open("r") as fp:
+        with open_source(path) as fp:
             reader = csv.DictReader(fp, dialect=dialect, fieldnames=fieldnames)
-            data = map(fix, list(reader))
+            for rows in chunked(reader, self.chunk_size):
+                yield validate_sv_rows(rows, self.mv_splitter)
+
+    def iter_sv_parallel(
+        self,
+        path: Path,
+        dialect: Type[csv.Dialect],
+        fieldnames=None,
+    ) -> Iterator[List[NamedEntity]]:
+        """
+        Splits a .csv or .tsv file into byte ranges at line boundaries,
+        parsed and validated by a pool of `workers` processes. Chunks are
+        yielded in file order.
 
-        return TypeAdapter(List[NamedEntity]).validate_python(data)
+        Workers send their entities back as JSON, validated again here in
+        pydantic-core (as read from the parse cache): unpickling pydantic
+        models one by one costs more than parsing the rows serially.
+        """
+        start = 0
+        if fieldnames is None:
+            with path.open("rb") as fp:
+                header = fp.readline()
+                start = fp.tell()
+            line = header.decode("utf-8")
+            fieldnames = next(csv.reader([line], dialect=dialect))
+
+        ranges = split_ranges(path, start, self.workers * 4)
+        if not ranges:
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            chunks = executor.map(
+                parse_sv_range,
+                *zip(*ranges),
+                repeat(path),
+                repeat(dialect),
+                repeat(fieldnames),
+                repeat(self.mv_splitter),
+            )
+            for block in chunks:
+                with paused_gc():
+                    chunk = NamedEntityListAdapter.validate_json(block)
+                yield chunk
+
+
+NamedEntityListAdapter = TypeAdapter(List[NamedEntity])
+
+
+class EntityView(Sequence[NamedEntity]):
+    """Read-only view of a subset of a list of entities."""
+
+    def __init__(self, entities: Sequence[NamedEntity], indices: List[int]):
+        self.entities = entities
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.entities[i] for i in self.indices[key]]
+        return self.entities[self.indices[key]]
+
+    def __iter__(self) -> Iterator[NamedEntity]:
+        entities = self.entities
+        return (entities[i] for i in self.indices)
+
+
+def parse_jsonl_block(lines: List[str]) -> List[NamedEntity]:
+    """
+    Parses and validates lines of NamedEntity definitions as one JSON array
+    in pydantic-core. Lines that aren't entity objects (e.g. ["value",
+    "alias"]) are converted one by one instead.
+
+    :param lines: Non-empty lines of a .jsonl file.
+    :return: List of Entities.
+    """
+    block = "[" + ",".join(lines) + "]"
+    with paused_gc():
+        try:
+            return NamedEntityListAdapter.validate_json(block)
+        except ValueError:
+            return [NamedEntity.convert(json.loads(ln)) for ln in lines]
+
+
+@contextmanager
+def paused_gc():
+    """
+    Pauses garbage collection while building many objects that are all
+    kept: the collections triggered by their allocations would cost more
+    than the parsing itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def validate_sv_rows(
+    rows: Iterable[dict], mv_splitter: str
+) -> List[NamedEntity]:
+    """Validates rows of a .csv or .tsv file, splitting their aliases."""
+
+    def fix(d):
+        aliases = (d.get("aliases") or "").split(mv_splitter)
+        d["aliases"] = list(filter(None, aliases))
+        return d
+
+    return NamedEntityListAdapter.validate_python(map(fix, rows))
+
+
+def split_ranges(path: Path, start: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits a file, from start, into (at most) parts byte ranges ending at
+    line boundaries.
+    """
+    size = os.path.getsize(path)
+    bounds = [start]
+    with path.open("rb") as fp:
+        for i in range(1, parts):
+            fp.seek(max(bounds[-1], start + (size - start) * i // parts))
+            fp.readline()
+            bounds.append(min(fp.tell(), size))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def parse_sv_range(
+    start: int,
+    end: int,
+    path: Path,
+    dialect: Type[csv.Dialect],
+    fieldnames: List[str],
+    mv_splitter: str,
+) -> bytes:
+    """
+    Parses and validates the rows of a byte range (in a worker).
+
+    :return: JSON array of the entities.
+    """
+    with path.open("rb") as fp:
+        fp.seek(start)
+        text = fp.read(end - start).decode("utf-8")
+    reader = csv.DictReader(
+        io.StringIO(text), dialect=dialect, fieldnames=fieldnames
+    )
+    entities = validate_sv_rows(reader, mv_splitter)
+    return NamedEntityListAdapter.dump_json(entities, exclude_defaults=True)
+
+
+def is_compressed(path: Path) -> bool:
+    return path.suffix.lower().lstrip(".") in Compressions
+
+
+def open_source(path: Path, mode: str = "rt") -> IO:
+    """
+    Opens a source file, decompressing .gz, .bz2, .xz and .zst files while
+    reading (zstandard is required for .zst).
+
+    :param path: Path of the source file.
+    :param mode: File mode, e.g. "rt" (text) or "rb" (binary).
+    :return: File object.
+    """
+    compression = path.suffix.lower().lstrip(".")
+    if compression == "gz":
+        # typeshed does not declare GzipFile (binary mode) as an IO
+        return cast(IO, gzip.open(path, mode))
+    if compression == "bz2":
+        return bz2.open(path, mode)
+    if compression == "xz":
+        return lzma.open(path, mode)
+    if compression == "zst":
+        zstandard = lazy.lazy_import("zstandard")
+        return zstandard.open(path, mode)
+    return path.open(mode.replace("t", ""))
+
+
+def iter_ipc_batches(reader: Any, size: int) -> Iterator[Any]:
+    """Slices the record batches of an Arrow IPC file (zero-copy)."""
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        for start in range(0, batch.num_rows, size):
+            yield batch.slice(start, size)
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Splits items into lists of (at most) size items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
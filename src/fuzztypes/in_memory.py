@@ -1,98 +1,264 @@
-from collections import defaultdict
-from typing import Callable, Iterable, Union, Type, Optional
+import hashlib
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pydantic import PositiveInt
 
 from fuzztypes import (
+    CompactEntity,
     FuzzValidator,
     Match,
     MatchResult,
     NamedEntity,
-    Record,
     const,
     flags,
     lazy,
+    logger,
     storage,
 )
+from fuzztypes.cache import ResolutionCache
+from fuzztypes.terms import TermStore
 
 
 class InMemoryValidatorStorage(storage.AbstractStorage):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, merge_entities: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._mapping = defaultdict(list)
-        self._terms = []
-        self._is_alias = []
-        self._entities = []
+        self.merge_entities = merge_entities
+
         self._embeddings = None
+        self._source_digest: Optional[str] = None
+
+        # entities, referenced by id from the rows of the term stores
+        self._entities: List[CompactEntity] = []
+
+        # name and alias rows of each normalized term
+        self._records = TermStore()
+
+        # unique fuzz/semantic terms (rapidfuzz choices), and the (entity,
+        # is_alias) postings of each, so each term is scanned/encoded once
+        self._terms: List[str] = []
+        self._postings = TermStore()
+
+        # (norm term, term, entity value) of the records and (term, entity
+        # value) of the postings added, to skip duplicates while preparing
+        self._record_keys: Set[Tuple[str, str, Any]] = set()
+        self._posting_keys: Set[Tuple[str, Any]] = set()
+
+        # norm terms shared by several entities, see `collisions`
+        self._collisions: Dict[str, List[str]] = {}
 
     #
     # Prepare
     #
 
     def prepare(self):
-        for item in self.source:
-            entity = self.entity_type.convert(item)
+        entities: Iterable[NamedEntity] = (
+            self.entity_type.convert(item) for item in self.source
+        )
+        if self.merge_entities:
+            entities = self.merge(entities)
+
+        # digest of the entities identifies the source in the cache
+        digest = hashlib.sha256()
+        for entity in entities:
             self.add(entity)
+            if self.resolution_cache is not None:
+                digest.update(entity.model_dump_json().encode("utf-8"))
+        self._source_digest = digest.hexdigest()[:16]
+
+        # only needed while adding the entities of the source
+        self._record_keys = set()
+        self._posting_keys = set()
+
+        self._collisions = self.find_collisions()
+        if self._collisions:
+            logger.info(
+                f"{len(self._collisions)} terms are shared by several "
+                f"entities, see `collisions`"
+            )
+
+    def merge(self, entities: Iterable[NamedEntity]) -> List[NamedEntity]:
+        """
+        Merges entities with the same normalized value, keeping the first
+        entity and the union of the aliases.
+
+        :param entities: Entities of the source.
+        :return: Merged entities, in order of first appearance.
+        """
+        merged: Dict[str, NamedEntity] = {}
+        for entity in entities:
+            key = self.normalize(entity.value) or ""
+            first = merged.get(key)
+            if first is None:
+                merged[key] = entity
+            else:
+                aliases = list(dict.fromkeys(first.aliases + entity.aliases))
+                aliases = [a for a in aliases if a != first.value]
+                if entity.value != first.value:
+                    aliases.append(entity.value)
+                merged[key] = first.model_copy(update=dict(aliases=aliases))
+        return list(merged.values())
+
+    def find_collisions(self) -> Dict[str, List[str]]:
+        collisions = {}
+        for norm_term in self._records.keys:
+            rows = self._records.rows(norm_term)
+            if len(rows) > 1:
+                entities = (self.entity(self._records, row) for row in rows)
+                values = list(dict.fromkeys(e.value for e in entities))
+                if len(values) > 1:
+                    collisions[norm_term] = values
+        return collisions
+
+    @property
+    def collisions(self) -> Dict[str, List[str]]:
+        """
+        Report of the normalized terms (names or aliases) shared by several
+        entities, with the values of those entities.
+        """
+        self.prepare_if_necessary()
+        return dict(self._collisions)
+
+    def preload(self) -> None:
+        # encode terms now rather than on the first semantic lookup
+        if self.search_flag.is_semantic_ok:
+            _ = self.embeddings
 
     def add(self, entity: NamedEntity) -> None:
+        # entities are held in compact form, materialized for matches
+        entity_id = self.add_entity(entity)
+
         if self.search_flag.is_name_ok:
-            self.add_by_name(entity)
+            self.add_by_name(entity_id)
 
         if self.search_flag.is_alias_ok:
-            self.add_by_alias(entity)
+            self.add_by_alias(entity_id)
 
         if self.search_flag.is_fuzz_or_semantic_ok:
-            self.add_fuzz_or_semantic(entity)
+            self.add_fuzz_or_semantic(entity_id)
+
+    def add_entity(self, entity: NamedEntity) -> int:
+        self._entities.append(CompactEntity.from_entity(entity))
+        return len(self._entities) - 1
+
+    def add_by_name(self, entity_id: int) -> None:
+        entity = self._entities[entity_id]
+        self.add_record(entity_id, entity.value, is_alias=False)
 
-    def add_by_name(self, entity: NamedEntity) -> None:
-        term = entity.value
+    def add_by_alias(self, entity_id: int) -> None:
+        for term in self._entities[entity_id].aliases:
+            self.add_record(entity_id, term, is_alias=True)
+
+    def add_record(self, entity_id: int, term: str, is_alias: bool):
         norm_term = self.normalize(term)
-        record = Record(
-            entity=entity, term=term, norm_term=norm_term, is_alias=False
-        )
-        self._mapping[norm_term].append(record)
 
-    def add_by_alias(self, entity: NamedEntity) -> None:
-        for term in entity.aliases:
-            norm_term = self.normalize(term)
-            record = Record(
-                entity=entity, term=term, norm_term=norm_term, is_alias=True
-            )
-            self._mapping[norm_term].append(record)
+        # duplicate term of the same entity value
+        key = (norm_term, term, self._entities[entity_id].value)
+        if key in self._record_keys:
+            return
+        self._record_keys.add(key)
 
-    def add_fuzz_or_semantic(self, entity: NamedEntity) -> None:
-        clean_name: str = self.fuzz_clean(entity.value)
-        self._terms.append(clean_name)
-        self._entities.append(entity)
-        self._is_alias.append(False)
+        self._records.append(norm_term, entity_id, is_alias, term=term)
 
+    def add_fuzz_or_semantic(self, entity_id: int) -> None:
+        entity = self._entities[entity_id]
+        self.add_term(self.fuzz_clean(entity.value), entity_id, False)
         for alias in entity.aliases:
-            clean_alias: str = self.fuzz_clean(alias)
-            self._terms.append(clean_alias)
-            self._entities.append(entity)
-            self._is_alias.append(True)
+            self.add_term(self.fuzz_clean(alias), entity_id, True)
+
+    def add_term(self, term: str, entity_id: int, is_alias: bool):
+        if term not in self._postings:
+            self._terms.append(term)
+
+        key = (term, self._entities[entity_id].value)
+        if key in self._posting_keys:
+            return
+        self._posting_keys.add(key)
+
+        self._postings.append(term, entity_id, is_alias)
+
+    def entity(self, store: TermStore, row: int) -> CompactEntity:
+        return self._entities[store.entity_ids[row]]
+
+    def find_entity_id(self, entity: NamedEntity) -> Optional[int]:
+        """Id of the stored entity with the same value, if any."""
+        searches = [
+            (self._records, self.normalize(entity.value)),
+            (self._postings, self.fuzz_clean(entity.value)),
+        ]
+        for store, key in searches:
+            for row in store.rows(key):
+                if self.entity(store, row) == entity:
+                    return store.entity_ids[row]
+        return None
+
+    @property
+    def source_identity(self) -> str:
+        self.prepare_if_necessary()
+        return f"in_memory:{self._source_digest}"
+
+    #
+    # Learned aliases
+    #
+
+    def add_learned(self, key: str, entity: NamedEntity) -> None:
+        entity_id = self.find_entity_id(entity)
+        if entity_id is None:
+            entity_id = self.add_entity(entity)
+        self._records.append(self.normalize(key), entity_id, True, term=key)
+
+    def remove_learned(self, key: str) -> None:
+        self._records.remove(self.normalize(key))
 
     #
     # Getters
     #
 
-    def get(self, key: str) -> MatchResult:
-        records = self._mapping.get(self.normalize(key), [])
-        match_list = Record.from_list(
-            records, key=key, entity_type=self.entity_type
-        )
+    def stages(self) -> List[Tuple[str, storage.Stage]]:
+        stages: List[Tuple[str, storage.Stage]] = [
+            ("exact", self.get_by_term),
+            ("norm", self.get_by_norm_term),
+        ]
 
-        results = MatchResult(matches=match_list)
+        if self.search_flag.is_fuzz_ok:
+            stages.append(("fuzz", self.get_by_fuzz))
 
-        if not results:
-            if self.search_flag.is_fuzz_ok:
-                results = self.get_by_fuzz(key)
+        if self.search_flag.is_semantic_ok:
+            stages.append(("semantic", self.get_by_semantic))
 
-            if self.search_flag.is_semantic_ok:
-                results = self.get_by_semantic(key)
+        return stages
 
-        return results
+    def get_by_term(self, key: str) -> List[Match]:
+        rows = self._records.rows(self.normalize(key))
+        rows = [row for row in rows if self._records.term(row) == key]
+        return self.to_matches(key, rows)
+
+    def get_by_norm_term(self, key: str) -> List[Match]:
+        rows = self._records.rows(self.normalize(key))
+        return self.to_matches(key, rows)
+
+    def to_matches(self, key: str, rows: Iterable[int]) -> List[Match]:
+        return [
+            Match(
+                key=key,
+                entity=self.entity(self._records, row).materialize(),
+                is_alias=self._records.is_alias(row),
+                term=self._records.term(row),
+            )
+            for row in rows
+        ]
 
     #
     # Fuzzy Matching
@@ -115,11 +281,20 @@ class InMemoryValidatorStorage(storage.AbstractStorage):
             limit=self.limit,
         )
 
+        postings = (
+            (key, score, row)
+            for key, score, _ in extract
+            for row in self._postings.rows(key)
+        )
+
         results = MatchResult()
-        for key, score, index in extract:
-            entity = self._entities[index]
-            is_alias = self._is_alias[index]
-            m = Match(key=key, entity=entity, is_alias=is_alias, score=score)
+        for key, score, row in islice(postings, self.limit):
+            m = Match(
+                key=key,
+                entity=self.entity(self._postings, row).materialize(),
+                is_alias=self._postings.is_alias(row),
+                score=score,
+            )
             results.append(m)
         return results
 
@@ -131,21 +306,23 @@ class InMemoryValidatorStorage(storage.AbstractStorage):
         # find closest match using knn
         indices, scores = self.find_knn(key)
 
+        postings = (
+            (self._terms[index], score, row)
+            for index, score in zip(indices, scores)
+            for row in self._postings.rows(self._terms[index])
+        )
+
         # create a MatchResult from the results
         results = MatchResult()
-        for index, score in zip(indices, scores):
-            entity = self._entities[index]
-            term = self._terms[index]
-            is_alias = self._is_alias[index]
+        for term, score, row in islice(postings, self.limit):
             match = Match(
                 key=key,
-                entity=entity,
+                entity=self.entity(self._postings, row).materialize(),
                 score=score,
-                is_alias=is_alias,
+                is_alias=self._postings.is_alias(row),
                 term=term,
             )
             results.append(match)
-
         return results
 
     @property
@@ -185,28 +362,55 @@ class InMemoryValidatorStorage(storage.AbstractStorage):
 def InMemoryValidator(
     source: Iterable,
     *,
+    background: bool = False,
+    build_timeout: Optional[float] = None,
+    cascade: Optional[List[str]] = None,
     case_sensitive: bool = False,
+    deadline_ms: Optional[float] = None,
     encoder: Union[Callable, str, object] = None,
     entity_type: Type[NamedEntity] = NamedEntity,
     examples: Optional[list] = None,
     fuzz_scorer: const.FuzzScorer = "token_sort_ratio",
+    learn: bool = False,
+    learn_limit: PositiveInt = 10_000,
+    learn_threshold: float = 95.0,
     limit: PositiveInt = 10,
+    merge_entities: bool = False,
     min_similarity: float = 80.0,
+    negative_cache_size: int = 0,
+    negative_cache_ttl: float = 300.0,
     notfound_mode: const.NotFoundMode = "raise",
+    resolution_cache: Optional[ResolutionCache] = None,
     search_flag: flags.SearchFlag = flags.DefaultSearch,
+    stage_budgets: Optional[Dict[str, float]] = None,
     tiebreaker_mode: const.TiebreakerMode = "raise",
 ):
     in_memory = InMemoryValidatorStorage(
         source,
+        background=background,
+        build_timeout=build_timeout,
+        cascade=cascade,
         case_sensitive=case_sensitive,
+        deadline_ms=deadline_ms,
         encoder=encoder,
         entity_type=entity_type,
         fuzz_scorer=fuzz_scorer,
+        learn=learn,
+        learn_limit=learn_limit,
+        learn_threshold=learn_threshold,
         limit=limit,
+        merge_entities=merge_entities,
         min_similarity=min_similarity,
+        negative_cache_size=negative_cache_size,
+        negative_cache_ttl=negative_cache_ttl,
         notfound_mode=notfound_mode,
+        resolution_cache=resolution_cache,
         search_flag=search_flag,
+        stage_budgets=stage_budgets,
         tiebreaker_mode=tiebreaker_mode,
     )
 
+    if background:
+        in_memory.warmup()
+
     return FuzzValidator(in_memory, examples=examples)
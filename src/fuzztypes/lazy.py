@@ -223,4 +223,11 @@ _lib_info = {
         "license": "BSD",
         "url": "https://scikit-learn.org/",
     },
+    "zstandard": {
+        "module_name": "zstandard",
+        "install_name": "zstandard",
+        "purpose": "Reading Zstandard compressed entity sources",
+        "license": "BSD",
+        "url": "https://github.com/indygreg/python-zstandard",
+    },
 }
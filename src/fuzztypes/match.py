@@ -27,6 +27,14 @@ class Match(BaseModel):
 class MatchResult(BaseModel):
     matches: List[Match] = Field(default_factory=list)
     choice: Optional[Match] = None
+    stage: Optional[str] = Field(
+        default=None,
+        description="Search stage that found the matches.",
+    )
+    cut_stage: Optional[str] = Field(
+        default=None,
+        description="Search stage cut short by the lookup deadline.",
+    )
 
     def __bool__(self):
         return bool(self.matches)
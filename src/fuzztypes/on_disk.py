@@ -1,4 +1,20 @@
-from typing import Callable, Iterable, Union, List, Type, Optional, Any
+import hashlib
+import json
+import os
+import uuid
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pydantic import PositiveInt
 
@@ -8,251 +24,851 @@ from fuzztypes import (
     MatchResult,
     NamedEntity,
     Record,
+    bundle,
     const,
     flags,
     lazy,
+    logger,
+    pool,
     storage,
 )
+from fuzztypes.cache import ResolutionCache
+from fuzztypes.codec import EntityCodec, get_codec
+from fuzztypes.entity import EntitySource, chunked
+from fuzztypes.trigrams import TrigramIndex
 
 accelerators = {"cuda", "mps"}
 
+# version of the table layout, part of the fingerprint of bundles
+# 2: vector column only stored by semantic tables
+# 3: entities stored as struct columns derived from the entity type
+TableFormat = 3
+
+# maximum number of values in a single `IN (...)` where clause
+IN_QUERY_SIZE = 1_000
+
+# columns with a scalar (BTREE) index, used by exact lookup where clauses
+SCALAR_INDEX_COLUMNS = ("term", "norm_term")
+
+# records encoded and added to the table at a time
+RECORD_BATCH_SIZE = 50_000
+
+# fuzzy candidates generated per result (re-scored using rapidfuzz)
+FUZZ_CANDIDATES = 20
+
+# learned alias rows added between two compactions of the table fragments
+LEARN_COMPACT_EVERY = 100
+
+# IVF-PQ calibration: number of held-out queries, recall@k target, and the
+# refine factors tried (in order) when nprobes alone can't reach the target.
+CALIBRATION_QUERIES = 100
+CALIBRATION_RECALL = 0.95
+CALIBRATION_REFINE_FACTORS = (None, 2, 5, 10)
+
 
 class StoredValidatorStorage(storage.AbstractStorage):
     def __init__(
         self,
         name: str,
         source: Iterable,
+        *,
+        bundle: Optional[str] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
         **kwargs,
     ):
         super().__init__(source, **kwargs)
 
         self.name = name
-        self._conn = None
-        self._table = None
+        self.bundle = bundle
+
+        # vector index query options, None uses calibrated values
+        self.nprobes = nprobes
+        self.refine_factor = refine_factor
+
+        self._trigrams: Optional[TrigramIndex] = None
+
+        # learned alias rows not yet added to the table, see `flush_learned`
+        self._learned_rows: Dict[str, dict] = {}
+        self._learned_adds = 0
 
     @property
     def conn(self) -> Any:
-        if self._conn is None:
-            lancedb = lazy.lazy_import("lancedb")
-            self._conn = lancedb.connect(const.StoredValidatorPath)
-        return self._conn
+        return pool.connect()
 
     @property
     def table(self) -> Any:
-        if self._table is None:
-            self._table = self.conn.open_table(self.name)
-        return self._table
+        return pool.open_table(self.name)
+
+    @property
+    def trigrams_path(self) -> str:
+        return os.path.join(pool.table_path(self.name), "_trigrams")
+
+    @property
+    def trigrams(self) -> TrigramIndex:
+        if self._trigrams is None:
+            path = self.trigrams_path
+            if not TrigramIndex.exists(path):
+                # tables created before the trigram index was introduced
+                terms = self.table.to_arrow().column("term").to_pylist()
+                TrigramIndex.build(terms, self.fuzz_clean).save(path)
+            self._trigrams = TrigramIndex.load(path)
+        return self._trigrams
+
+    @property
+    def vect_dimensions(self) -> int:
+        # stored in metadata at creation, avoids loading the encoder
+        if self._vect_dimensions is None:
+            meta = pool.get_metadata(self.name)
+            self._vect_dimensions = meta.get("dimensions")
+        return self._vect_dimensions or super().vect_dimensions
+
+    @property
+    def codec(self) -> EntityCodec:
+        return get_codec(self.entity_type)
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the table layout created by this configuration."""
+        config = dict(
+            format=TableFormat,
+            case_sensitive=self.case_sensitive,
+            search_flag=self.search_flag.value,
+            encoder=self.encoder_name,
+            entity=str(self.codec.arrow_type),
+        )
+        data = json.dumps(config, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()[:16]
 
     def prepare(self, force_drop_table: bool = False):
-        table_names = set(self.conn.table_names(limit=999_999_999))
+        # serialize builds of the same table across threads
+        with pool.table_lock(self.name):
+            # another process may have built the table since names and
+            # metadata were cached by this process
+            table_names = pool.table_names(refresh=True)
+            pool.get_metadata(self.name, refresh=True)
+
+            if self.name in table_names and not self.is_current:
+                logger.info(f"Rebuilding {self.name} (outdated layout)")
+                force_drop_table = True
+
+            if force_drop_table and self.name in table_names:
+                pool.drop_table(self.name)
+
+            if self.name not in table_names and self.bundle:
+                self.import_bundle()
+                table_names = pool.table_names()
+
+            if self.name not in table_names:
+                self._trigrams = None
+                try:
+                    self.create_table()
+                except Exception as e:  # pragma: no cover
+                    # if any issue occurs, drop the table and re-raise error
+                    # in the future, handle errors better
+                    pool.drop_table(self.name)
+                    raise e
 
-        if force_drop_table and self.name in table_names:
-            self.conn.drop_table(self.name)
-            table_names -= {self.name}
+    #
+    # learned aliases
+    #
 
-        if self.name not in table_names:
-            try:
-                self.create_table()
-            except Exception as e:  # pragma: no cover
-                # if any issue occurs, drop the table and re-raise error
-                # in the future, handle errors better
-                self.conn.drop_table(self.name)
-                raise e
+    @property
+    def learned_path(self) -> str:
+        return os.path.join(pool.table_path(self.name), "_learned.json")
 
-    def create_table(self):
+    @property
+    def learn_lock(self) -> Any:
+        # shared by the storages of a table, e.g. LanguageName and Language
+        return pool.table_lock(self.name)
+
+    def learned_aliases(self) -> List[str]:
+        # the list is only guarded by an in-process lock: learning on the
+        # same table from several processes can lose learned aliases
+        if not os.path.exists(self.learned_path):
+            return []
+        with open(self.learned_path) as fp:
+            return json.load(fp)
+
+    def save_learned(self, keys: List[str]) -> None:
+        temp_path = f"{self.learned_path}.tmp"
+        with open(temp_path, "w") as fp:
+            json.dump(keys, fp)
+        os.replace(temp_path, self.learned_path)
+
+    def add_learned(self, key: str, entity: NamedEntity) -> None:
+        record = Record(
+            entity=entity,
+            term=key,
+            norm_term=self.normalize(key),
+            is_alias=True,
+        )
+        if self.search_flag.is_semantic_ok:
+            record.vector = self.encode([key])[0]
+
+        with self.learn_lock:
+            self._learned_rows.setdefault(
+                record.norm_term or "", self.to_row(record)
+            )
+
+    def remove_learned(self, key: str) -> None:
+        with self.learn_lock:
+            self._learned_rows.pop(self.normalize(key) or "", None)
+            self.table.delete(f"term = {quote(key)}")
+
+    def flush_learned(self) -> None:
+        """
+        Adds the aliases learned by a lookup (or a batch of lookups) to the
+        table in a single append, compacting the table's fragments every
+        `LEARN_COMPACT_EVERY` learned rows.
+        """
         pa = lazy.lazy_import("pyarrow")
 
-        schema = pa.schema(
-            [
-                pa.field("term", pa.string()),
-                pa.field("norm_term", pa.string()),
-                pa.field("entity", pa.string()),
-                pa.field("is_alias", pa.string()),
-                pa.field(
-                    "vector",
-                    pa.list_(pa.float32(), self.vect_dimensions),
-                ),
-            ]
-        )
-        table = self.conn.create_table(self.name, schema=schema, exist_ok=True)
+        with self.learn_lock:
+            rows = list(self._learned_rows.values())
+            if not rows:
+                return
+            self._learned_rows = {}
+
+            table = self.table
+            table.add(pa.Table.from_pylist(rows, schema=table.schema))
+
+            self._learned_adds += len(rows)
+            if self._learned_adds >= LEARN_COMPACT_EVERY:
+                self._learned_adds = 0
+                table.compact_files()
 
-        # create records from source
-        records = self.create_records()
+    def needs_fallback(self) -> bool:
+        return self.name not in pool.table_names()
+
+    def preload(self) -> None:
+        # load the trigram index now rather than on the first fuzzy lookup
+        if self.search_flag.is_fuzz_ok:
+            _ = self.trigrams
+
+    @property
+    def source_identity(self) -> str:
+        # a new build id is stored each time the table is created
+        meta = pool.get_metadata(self.name)
+        return f"{self.name}:{meta.get('fingerprint')}:{meta.get('build')}"
 
-        # calculate vectors in a batch
+    @property
+    def is_current(self) -> bool:
+        """Whether the table on disk was built with this configuration."""
+        fingerprint = pool.get_metadata(self.name).get("fingerprint")
+        return fingerprint == self.fingerprint
+
+    def import_bundle(self):
+        """Imports the table from a prebuilt bundle, skipping the build."""
+        assert self.bundle, f"No bundle configured: {self.name}"
+        try:
+            bundle.import_table(
+                self.bundle, name=self.name, fingerprint=self.fingerprint
+            )
+            self._trigrams = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Bundle not imported, building {self.name}: {e}")
+
+    def create_table(self):
+        pa = lazy.lazy_import("pyarrow")
+
+        fields = [
+            pa.field("term", pa.string()),
+            pa.field("norm_term", pa.string()),
+            pa.field("entity", self.codec.arrow_type),
+            pa.field("is_alias", pa.bool_()),
+        ]
+
+        # only semantic tables store vectors (and load the encoder)
+        meta: Dict[str, Any] = dict(
+            fingerprint=self.fingerprint, build=uuid.uuid4().hex
+        )
         if self.search_flag.is_semantic_ok:
-            terms = [record.term for record in records]
-            vectors = self.encode(terms)
-            for record, vector in zip(records, vectors):
-                record.vector = vector
+            dimensions = self.vect_dimensions
+            vector_type = pa.list_(pa.float32(), dimensions)
+            fields.append(pa.field("vector", vector_type))
+            meta["dimensions"] = dimensions
+
+        schema = pa.schema(fields)
+        table = pool.create_table(self.name, schema)
+        pool.update_metadata(self.name, **meta)
+
+        # add rows to the table in batches, streaming the source (terms
+        # and vectors are read back from the table when indexing)
+        num_records = 0
+        for rows in self.iter_rows(pa.schema(fields[:4])):
+            if not rows.num_rows:
+                continue
+
+            # calculate vectors in a batch
+            if self.search_flag.is_semantic_ok:
+                np = lazy.lazy_import("numpy")
+                batch_terms = rows.column("term").to_pylist()
+                values = np.asarray(self.encode(batch_terms), dtype=np.float32)
+                column = pa.FixedSizeListArray.from_arrays(
+                    pa.array(values.ravel()), self.vect_dimensions
+                )
+                rows = rows.append_column(schema.field("vector"), column)
 
-        # add records in a batch to table
-        table.add([record.model_dump() for record in records])
+            table.add(rows)
+            num_records += rows.num_rows
 
-        # adjust num_partitions and num_sub_vectors based on dataset size
-        num_records = len(records)
+        if num_records:
+            for column in SCALAR_INDEX_COLUMNS:
+                table.create_scalar_index(column, replace=True)
 
         should_index = num_records > 256 and self.search_flag.is_semantic_ok
 
-        if self.search_flag.is_fuzz_ok:  # pragma: no cover
-            table.create_fts_index("term")
+        if self.search_flag.is_fuzz_ok:
+            terms = (
+                term
+                for column in iter_column(table, "term")
+                for term in column.to_pylist()
+            )
+            trigram_index = TrigramIndex.build(terms, self.fuzz_clean)
+            trigram_index.save(self.trigrams_path)
 
-        if should_index:  # pragma: no cover
-            num_partitions = min(num_records, 256)
-            num_sub_vectors = min(num_records, 96)
+        if should_index:
+            # derive num_partitions and num_sub_vectors from dataset shape
+            params = tune_index(num_records, self.vect_dimensions)
             index_cache_size = min(num_records, 256)
             accelerator = self.device if self.device in accelerators else None
 
             table.create_index(
                 metric="cosine",
-                num_partitions=num_partitions,
-                num_sub_vectors=num_sub_vectors,
                 vector_column_name="vector",
                 replace=True,
                 index_cache_size=index_cache_size,
                 accelerator=accelerator,
+                **params,
             )
 
-    def create_records(self):
-        records = []
-        empty = [0.0] * self.vect_dimensions
+            # pick query-time parameters that reach the recall target
+            params.update(self.calibrate_index(table, params))
+            pool.update_metadata(self.name, index=params)
+
+    def calibrate_index(self, table, params: dict) -> dict:
+        """
+        Measures recall@k of the vector index against brute force on a
+        sample of held-out queries (midpoints of random pairs of vectors).
+        Vectors are read back from the table in batches.
+
+        :param table: Table with a freshly built vector index.
+        :param params: Index build parameters (num_partitions).
+        :return: Smallest nprobes/refine_factor reaching the recall target.
+        """
+        np = lazy.lazy_import("numpy")
+
+        num_rows = table.count_rows()
+        k = min(self.limit, num_rows)
+
+        rng = np.random.default_rng(0)
+        pairs = rng.integers(0, num_rows, size=(CALIBRATION_QUERIES, 2))
+        sample = table.to_lance().take(
+            pairs.ravel().tolist(), columns=["vector"]
+        )
+        sample = unit_vectors(sample.column("vector").combine_chunks())
+        queries = sample[0::2] + sample[1::2]
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+
+        # exact k-th best cosine similarity of each query (brute force)
+        best = np.empty((len(queries), 0), dtype=np.float32)
+        for column in iter_column(table, "vector"):
+            chunk = queries @ unit_vectors(column).T
+            best = np.concatenate([best, chunk], axis=1)
+            best = np.partition(best, -k, axis=1)[:, -k:]
+        kth = best.min(axis=1)
+
+        nprobes_options = []
+        nprobes = 1
+        while nprobes < params["num_partitions"]:
+            nprobes_options.append(nprobes)
+            nprobes *= 2
+        nprobes_options.append(params["num_partitions"])
+
+        result: dict = {}
+        for refine_factor in CALIBRATION_REFINE_FACTORS:
+            for nprobes in nprobes_options:
+                found = 0
+                for query, threshold in zip(queries, kth):
+                    qb = table.search(query, vector_column_name="vector")
+                    qb = qb.metric("cosine").nprobes(nprobes)
+                    if refine_factor is not None:
+                        qb = qb.refine_factor(refine_factor)
+                    qb = qb.select(["term"]).limit(k)
+                    distances = qb.to_arrow()["_distance"].to_numpy()
+                    found += int(np.sum(1 - distances >= threshold - 1e-4))
+
+                recall = found / (k * len(queries))
+                result = dict(
+                    nprobes=nprobes,
+                    refine_factor=refine_factor,
+                    recall=recall,
+                )
+                if recall >= CALIBRATION_RECALL:
+                    return result
+
+        return result
+
+    def iter_rows(self, schema: Any) -> Iterator[Any]:
+        """
+        Rows of the table (without vectors) as Arrow tables. Columnar
+        sources of named entities are converted batch by batch with Arrow
+        compute functions, other sources record by record.
+
+        :param schema: Schema of the term, norm_term, entity and is_alias
+                       columns.
+        :return: Iterator of pyarrow Table objects.
+        """
+        pa = lazy.lazy_import("pyarrow")
+
+        if self.is_columnar_source:
+            assert isinstance(self.source, EntitySource)
+            for batch in self.source.iter_batches():
+                yield self.arrow_rows(batch, schema)
+            return
+
+        for records in chunked(self.iter_records(), RECORD_BATCH_SIZE):
+            rows = [self.to_row(record) for record in records]
+            yield pa.Table.from_pylist(rows, schema=schema)
+
+    @property
+    def is_columnar_source(self) -> bool:
+        """Whether rows can be created from Arrow batches of the source."""
+        return (
+            isinstance(self.source, EntitySource)
+            and self.source.is_columnar
+            and not self.source.meta_columns
+            and self.codec.arrow_type == get_codec(NamedEntity).arrow_type
+        )
+
+    def arrow_rows(self, batch: Any, schema: Any) -> Any:
+        """
+        Converts a batch of an EntitySource (value, aliases, label and
+        priority columns) into rows of the table, one per term.
+        """
+        pa = lazy.lazy_import("pyarrow")
+        pc = lazy.lazy_import("pyarrow.compute")
+        np = lazy.lazy_import("numpy")
+
+        values = batch.column("value")
+        if values.null_count:
+            raise ValueError("Entity values can't be null")
+
+        columns = dict(zip(batch.schema.names, batch.columns))
+        columns["meta"] = pa.nulls(batch.num_rows, pa.string())
+        entity_type = self.codec.arrow_type
+        entities = pa.StructArray.from_arrays(
+            [columns[field.name] for field in entity_type],
+            fields=list(entity_type),
+        )
+
+        # terms: each entity's value, then its aliases
+        terms, indices, is_alias = [], [], []
+        if self.search_flag.is_name_ok:
+            terms.append(values)
+            indices.append(np.arange(batch.num_rows))
+            is_alias.append(np.zeros(batch.num_rows, dtype=bool))
+        if self.search_flag.is_alias_ok:
+            aliases = batch.column("aliases")
+            flat = pc.list_flatten(aliases)
+            terms.append(flat)
+            indices.append(pc.list_parent_indices(aliases).to_numpy())
+            is_alias.append(np.ones(len(flat), dtype=bool))
+
+        if not terms:
+            return schema.empty_table()
+
+        order = np.argsort(np.concatenate(indices), kind="stable")
+        term = pc.take(pa.concat_arrays(terms), order)
+        index = np.concatenate(indices)[order]
+        alias = np.concatenate(is_alias)[order]
+
+        keep = pc.not_equal(term, "").to_numpy(zero_copy_only=False)
+        term = pc.filter(term, keep)
+
+        # same normalization as lookups (Arrow's utf8_lower differs from
+        # str.lower for some characters, e.g. "İ")
+        norm_term = pa.array(
+            [self.normalize(t) for t in term.to_pylist()], type=pa.string()
+        )
+
+        return pa.Table.from_arrays(
+            [
+                term,
+                norm_term,
+                pc.take(entities, index[keep]),
+                pa.array(alias[keep]),
+            ],
+            schema=schema,
+        )
+
+    def create_records(self) -> List[Record]:
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[Record]:
+        """Records of the source's terms, read one entity at a time."""
         for item in self.source:
             entity = self.entity_type.convert(item)
-            json = entity.model_dump_json(exclude_defaults=True)
 
             terms = []
-            is_alias = False
-
             if self.search_flag.is_name_ok:
-                terms.append(entity.value)
-                is_alias = True
+                terms.append((entity.value, False))
 
             if self.search_flag.is_alias_ok:
-                terms += entity.aliases
+                terms += [(alias, True) for alias in entity.aliases]
 
-            for term in terms:
+            for term, is_alias in terms:
                 # normalize for case sensitivity
                 norm_term = self.normalize(term)
 
                 # construct and add record
                 if term:
                     record = Record(
-                        entity=json,
+                        entity=entity,
                         term=term,
                         norm_term=norm_term,
                         is_alias=is_alias,
-                        vector=empty,
                     )
-                    records.append(record)
-
-                # 2nd term and beyond are aliases
-                is_alias = True
-
-        return records
+                    yield record
+
+    def to_row(self, record: Record) -> Dict[str, Any]:
+        entity = record.entity
+        if isinstance(entity, str):
+            entity = self.codec.decode(entity)
+
+        row = dict(
+            term=record.term,
+            norm_term=record.norm_term,
+            entity=self.codec.encode(entity),
+            is_alias=record.is_alias,
+        )
+        if record.vector is not None:
+            row["vector"] = record.vector
+        return row
 
     #
     # Getters
     #
 
-    def get(self, key: str) -> MatchResult:
-        where = f'term = "{key}"'
-        match_list = self.run_query(key, where=where)
-
-        if not match_list:
-            where = f'norm_term = "{self.normalize(key)}"'
-            match_list = self.run_query(key, where=where)
+    def stages(self) -> List[Tuple[str, storage.Stage]]:
+        stages: List[Tuple[str, storage.Stage]] = [
+            ("exact", self.get_by_term),
+            ("norm", self.get_by_norm_term),
+        ]
 
-        if not match_list:
-            if self.search_flag.is_fuzz_ok:
-                match_list = self.get_by_fuzz(key)
+        if self.search_flag.is_fuzz_ok:
+            stages.append(("fuzz", self.get_by_fuzz))
 
-            if self.search_flag.is_semantic_ok:
-                match_list = self.get_by_semantic(key)
-
-        matches = MatchResult(matches=match_list)
-        return matches
+        if self.search_flag.is_semantic_ok:
+            stages.append(("semantic", self.get_by_semantic))
+
+        return stages
+
+    def get_by_term(self, key: str) -> List[Match]:
+        return self.run_query(key, where=f"term = {quote(key)}")
+
+    def get_by_norm_term(self, key: str) -> List[Match]:
+        where = f"norm_term = {quote(self.normalize(key))}"
+        return self.run_query(key, where=where)
+
+    def get_many(self, keys: List[str]) -> List[MatchResult]:
+        if self.has_deadline or self.cascade is not None:
+            # time budgets and custom cascades apply to each lookup
+            return super().get_many(keys)
+        return self.run_queries(keys)
+
+    def run_queries(self, keys: List[str]) -> List[MatchResult]:
+        """
+        Batch version of get, exact lookups are grouped into `IN (...)`
+        queries and query vectors are encoded in a single call.
+
+        :param keys: Keys to look up.
+        :return: MatchResult for each key, in the same order as keys.
+        """
+        found: Dict[str, MatchResult] = {}
+        pending = list(dict.fromkeys(keys))
+
+        # exact match on term
+        rows = self.run_in_query("term", pending)
+        for key in pending:
+            matches = self.to_matches(key, rows.get(key, []))
+            found[key] = MatchResult(matches=matches, stage="exact")
+        pending = [key for key in pending if not found[key]]
+
+        # exact match on normalized term
+        norm_keys = {key: self.normalize(key) for key in pending}
+        rows = self.run_in_query("norm_term", list(norm_keys.values()))
+        for key, norm_key in norm_keys.items():
+            matches = self.to_matches(key, rows.get(norm_key, []))
+            found[key] = MatchResult(matches=matches, stage="norm")
+        pending = [key for key in pending if not found[key]]
+
+        if pending and self.search_flag.is_fuzz_ok:
+            for key in pending:
+                matches = self.get_by_fuzz(key)
+                found[key] = MatchResult(matches=matches, stage="fuzz")
+
+        if pending and self.search_flag.is_semantic_ok:
+            vectors = self.encode(pending)
+            for key, vector in zip(pending, vectors):
+                matches = self.run_query(key, vector=vector)
+                found[key] = MatchResult(matches=matches, stage="semantic")
+
+        # copies, as choose() records its choice on the result
+        return [found[key].model_copy() for key in keys]
+
+    def run_in_query(self, column: str, values: List[str]) -> Dict[str, list]:
+        """
+        Finds the rows whose column is one of the values.
+
+        :param column: Column to filter on (term or norm_term).
+        :param values: Values to look up, queried in chunks.
+        :return: Rows grouped by column value, up to limit rows per value.
+        """
+        rows: Dict[str, list] = defaultdict(list)
+        values = list(dict.fromkeys(filter(None, values)))
+
+        for start in range(0, len(values), IN_QUERY_SIZE):
+            chunk = values[start : start + IN_QUERY_SIZE]
+            in_list = ", ".join(map(quote, chunk))
+            qb = self.table.search()
+            qb = qb.select(["entity", "term", "norm_term", "is_alias"])
+            qb = qb.where(f"{column} IN ({in_list})", prefilter=True)
+            qb = qb.limit(None)
+
+            for item in qb.to_list():
+                group = rows[item[column]]
+                if len(group) < self.limit:
+                    group.append(item)
+
+        return rows
 
     def get_by_fuzz(self, key: str) -> List[Match]:
-        query = self.normalize(key)
-        match_list = self.run_query(key, vector=query)
+        # candidate terms sharing the most trigrams with the key
+        limit = self.limit * FUZZ_CANDIDATES
+        candidates = self.trigrams.candidates(self.fuzz_clean(key), limit)
 
-        # re-scoring using rapidfuzz on matches
-        terms = [match.term for match in match_list]
+        # re-score candidates using rapidfuzz, keeping the top terms
         extract = self.rapidfuzz.process.extract(
-            query, terms, scorer=self.fuzz_scorer
+            key,
+            candidates,
+            scorer=self.fuzz_scorer,
+            processor=self.rapidfuzz.utils.default_process,
+            limit=self.limit,
+            score_cutoff=self.score_cutoff,
         )
-        for key, score, index in extract:
-            match_list[index].score = score
+        scores = {term: score for term, score, _ in extract}
 
-        return match_list
+        rows = self.run_in_query("term", list(scores))
+        match_list = []
+        for term, score in scores.items():
+            for match in self.to_matches(key, rows.get(term, [])):
+                match.score = score
+                match_list.append(match)
+
+        return sorted(match_list)[: self.limit]
 
     def get_by_semantic(self, key: str) -> List[Match]:
         vector = self.encode([key])[0]
         return self.run_query(key, vector=vector)
 
     def run_query(self, key, where=None, vector=None) -> List[Match]:
-        qb = self.table.search(query=vector, vector_column_name="vector")
+        if vector is None:
+            qb = self.table.search()
+        else:
+            qb = self.table.search(query=vector, vector_column_name="vector")
 
         if vector is not None and self.search_flag.is_semantic_ok:
             qb = qb.metric("cosine")
 
+            nprobes, refine_factor = self.query_params
+            if nprobes is not None:
+                qb = qb.nprobes(nprobes)
+            if refine_factor is not None:
+                qb = qb.refine_factor(refine_factor)
+
         qb = qb.select(["entity", "term", "norm_term", "is_alias"])
 
         if where is not None:
             qb = qb.where(where, prefilter=True)
 
         qb = qb.limit(self.limit)
-        data = qb.to_list()
+        data = qb.to_arrow()
+
+        return self.arrow_matches(key, data)
+
+    def arrow_matches(self, key: str, data: Any) -> List[Match]:
+        """
+        Converts query results into matches, scoring rows with numpy and
+        only materializing the rows that pass the score cutoff.
+
+        :param key: Key being looked up.
+        :param data: pyarrow table of query results.
+        :return: Matches in result order.
+        """
+        np = lazy.lazy_import("numpy")
+
+        if "_distance" in data.column_names:
+            # cosine distance to similarity, normalized to 0-100
+            distances = data["_distance"].to_numpy()
+            scores = (1 - distances + 1) * 50
+        else:
+            scores = np.full(data.num_rows, 100.0)  # exact match
+
+        keep = np.flatnonzero(scores >= self.score_cutoff)
+        columns = ["entity", "term", "is_alias"]
+        rows = data.select(columns).take(keep).to_pylist()
+
+        return [
+            Match(
+                key=key,
+                entity=self.codec.decode(row["entity"]),
+                is_alias=row["is_alias"],
+                score=float(score),
+                term=row["term"],
+            )
+            for row, score in zip(rows, scores[keep])
+        ]
 
-        match_list = []
-        for item in data:
-            if "_distance" in item:
-                distance = item.pop("_distance", 0.0)
-                similarity = 1 - distance
-                score = (similarity + 1) * 50
-            elif "score" in item:
-                score = item.pop("score", 0.0)
-            else:
-                score = 100.0  # Exact match
-
-            record = Record.model_validate(item)
-            match = record.to_match(
-                key=key, score=score, entity_type=self.entity_type
+    @property
+    def query_params(self) -> Tuple[Optional[int], Optional[int]]:
+        """Vector query nprobes and refine_factor (option or calibrated)."""
+        index = pool.get_metadata(self.name).get("index", {})
+        nprobes = self.nprobes or index.get("nprobes")
+        refine_factor = self.refine_factor or index.get("refine_factor")
+        return nprobes, refine_factor
+
+    def to_matches(self, key: str, data: List[dict]) -> List[Match]:
+        # rows are found by (normalized) term, so matches are exact
+        return [
+            Match(
+                key=key,
+                entity=self.codec.decode(item["entity"]),
+                is_alias=item["is_alias"],
+                score=100.0,
+                term=item["term"],
             )
-            match_list.append(match)
+            for item in data
+        ]
+
+
+def tune_index(num_records: int, dimensions: int) -> dict:
+    """
+    Derives IVF-PQ build parameters from corpus size and vector dimension.
+
+    :param num_records: Number of vectors indexed.
+    :param dimensions: Vector dimension.
+    :return: num_partitions and num_sub_vectors
+    """
+    # ~sqrt(n) partitions, with enough vectors per partition to train on
+    num_partitions = int(num_records**0.5)
+    num_partitions = max(1, min(num_partitions, num_records // 256, 4096))
+
+    # sub-vectors of 8 (or 16) dimensions keep PQ distance tables SIMD-sized
+    num_sub_vectors = 1
+    for width in (8, 16, 4, 2):
+        if dimensions % width == 0:
+            num_sub_vectors = dimensions // width
+            break
+
+    return dict(num_partitions=num_partitions, num_sub_vectors=num_sub_vectors)
+
+
+def iter_column(table: Any, name: str) -> Iterator[Any]:
+    """
+    Reads a column of a table back from the Lance dataset in batches.
+
+    :param table: lancedb table
+    :param name: Column name
+    :return: Iterator of pyarrow arrays.
+    """
+    dataset = table.to_lance()
+    for batch in dataset.to_batches(
+        columns=[name], batch_size=RECORD_BATCH_SIZE
+    ):
+        yield batch.column(0)
+
 
-        return match_list
+def unit_vectors(column: Any) -> Any:
+    """
+    Converts a vector column into a matrix of L2-normalized rows.
+
+    :param column: pyarrow FixedSizeListArray of float32 vectors.
+    :return: numpy array of shape (rows, dimensions)
+    """
+    np = lazy.lazy_import("numpy")
+
+    values = column.flatten().to_numpy().reshape(len(column), -1)
+    return values / (np.linalg.norm(values, axis=1, keepdims=True) + 1e-12)
+
+
+def quote(value: Optional[str]) -> str:
+    """Quotes a string literal for use in a LanceDB where clause."""
+    escaped = ("" if value is None else str(value)).replace("'", "''")
+    return f"'{escaped}'"
 
 
 def OnDiskValidator(
     identity: str,
     source: Iterable,
     *,
+    background: bool = False,
+    build_timeout: Optional[float] = None,
+    bundle: Optional[str] = None,
+    cascade: Optional[List[str]] = None,
     case_sensitive: bool = False,
+    deadline_ms: Optional[float] = None,
     device: Optional[const.DeviceList] = None,
     encoder: Union[Callable, str, object] = None,
     entity_type: Type[NamedEntity] = NamedEntity,
     examples: Optional[list] = None,
     fuzz_scorer: const.FuzzScorer = "token_sort_ratio",
+    learn: bool = False,
+    learn_limit: PositiveInt = 10_000,
+    learn_threshold: float = 95.0,
     limit: PositiveInt = 10,
     min_similarity: float = 80.0,
+    negative_cache_size: int = 0,
+    negative_cache_ttl: float = 300.0,
     notfound_mode: const.NotFoundMode = "raise",
+    nprobes: Optional[PositiveInt] = None,
+    refine_factor: Optional[PositiveInt] = None,
+    resolution_cache: Optional[ResolutionCache] = None,
     search_flag: flags.SearchFlag = flags.DefaultSearch,
+    stage_budgets: Optional[Dict[str, float]] = None,
     tiebreaker_mode: const.TiebreakerMode = "raise",
 ):
     on_disk = StoredValidatorStorage(
         identity,
         source,
+        background=background,
+        build_timeout=build_timeout,
+        bundle=bundle,
+        cascade=cascade,
         case_sensitive=case_sensitive,
+        deadline_ms=deadline_ms,
         device=device,
         entity_type=entity_type,
         fuzz_scorer=fuzz_scorer,
+        learn=learn,
+        learn_limit=learn_limit,
+        learn_threshold=learn_threshold,
         limit=limit,
         min_similarity=min_similarity,
+        negative_cache_size=negative_cache_size,
+        negative_cache_ttl=negative_cache_ttl,
         notfound_mode=notfound_mode,
+        nprobes=nprobes,
+        refine_factor=refine_factor,
+        resolution_cache=resolution_cache,
         search_flag=search_flag,
+        stage_budgets=stage_budgets,
         encoder=encoder,
         tiebreaker_mode=tiebreaker_mode,
     )
 
+    if background:
+        on_disk.warmup()
+
     return FuzzValidator(on_disk, examples=examples)
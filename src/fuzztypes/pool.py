@@ -0,0 +1,263 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fuzztypes import const, lazy
+
+# Process-wide registry of LanceDB connections and open table handles.
+# Handles are keyed by (path, table name) so every storage pointing at the
+# same table (e.g. LanguageName, LanguageCode and Language) shares a single
+# handle. Registry is reset when a forked child process first touches it.
+#
+# Table metadata (index parameters, vector dimensions, ...) is persisted as
+# a JSON file inside the table's directory, so it travels with the table.
+
+TableKey = Tuple[str, str]
+
+_lock = threading.RLock()
+_pid = os.getpid()
+_connections: Dict[str, Any] = {}
+_table_names: Dict[str, Set[str]] = {}
+_tables: Dict[TableKey, Any] = {}
+_table_locks: Dict[TableKey, threading.RLock] = {}
+_metadata: Dict[TableKey, dict] = {}
+
+MetadataFileName = "fuzztypes.json"
+
+
+def _check_fork() -> None:
+    """Discard handles (and locks) inherited from a parent process."""
+    global _lock, _pid
+
+    pid = os.getpid()
+    if pid != _pid:
+        # parent thread may have held the lock while forking
+        _lock = threading.RLock()
+        _pid = pid
+        _connections.clear()
+        _table_names.clear()
+        _tables.clear()
+        _table_locks.clear()
+        _metadata.clear()
+
+
+def _get_path(path: Optional[str]) -> str:
+    return path or const.StoredValidatorPath
+
+
+def connect(path: Optional[str] = None) -> Any:
+    """
+    Returns the shared LanceDB connection for a path.
+
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :return: lancedb connection
+    """
+    _check_fork()
+    path = _get_path(path)
+
+    conn = _connections.get(path)
+    if conn is None:
+        with _lock:
+            conn = _connections.get(path)
+            if conn is None:
+                lancedb = lazy.lazy_import("lancedb")
+                conn = lancedb.connect(path)
+                _connections[path] = conn
+    return conn
+
+
+def table_names(path: Optional[str] = None, refresh: bool = False) -> Set[str]:
+    """
+    Returns the names of tables in a database, listed once per process.
+
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :param refresh: Re-read table names from disk.
+    :return: Set of table names
+    """
+    _check_fork()
+    path = _get_path(path)
+
+    names = _table_names.get(path)
+    if names is None or refresh:
+        with _lock:
+            names = _table_names.get(path)
+            if names is None or refresh:
+                conn = connect(path)
+                names = set(conn.table_names(limit=999_999_999))
+                _table_names[path] = names
+    return names
+
+
+def open_table(name: str, path: Optional[str] = None) -> Any:
+    """
+    Returns the shared handle of a table, opening it on first access.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :return: lancedb table
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    table = _tables.get(key)
+    if table is None:
+        with _lock:
+            table = _tables.get(key)
+            if table is None:
+                table = connect(key[0]).open_table(name)
+                _tables[key] = table
+    return table
+
+
+def create_table(
+    name: str,
+    schema: Any,
+    path: Optional[str] = None,
+    exist_ok: bool = False,
+) -> Any:
+    """
+    Creates a table and registers its handle.
+
+    :param name: Table name
+    :param schema: pyarrow schema of the table
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :param exist_ok: Open the table if it already exists, instead of
+                     raising an error.
+    :return: lancedb table
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    with _lock:
+        conn = connect(key[0])
+        table = conn.create_table(name, schema=schema, exist_ok=exist_ok)
+        _tables[key] = table
+        table_names(key[0]).add(name)
+    return table
+
+
+def drop_table(name: str, path: Optional[str] = None) -> None:
+    """
+    Drops a table from disk and forgets its handle.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    with _lock:
+        _tables.pop(key, None)
+        _metadata.pop(key, None)
+        table_names(key[0]).discard(name)
+        connect(key[0]).drop_table(name)
+
+
+def forget_table(name: str, path: Optional[str] = None) -> None:
+    """
+    Forgets the handle and metadata of a table replaced on disk.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    with _lock:
+        _tables.pop(key, None)
+        _metadata.pop(key, None)
+        _table_names.pop(key[0], None)
+
+
+def table_path(name: str, path: Optional[str] = None) -> str:
+    """
+    Returns the directory of a table's Lance dataset.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :return: Path of the table directory
+    """
+    return os.path.join(_get_path(path), f"{name}.lance")
+
+
+def get_metadata(
+    name: str, path: Optional[str] = None, refresh: bool = False
+) -> dict:
+    """
+    Returns the metadata stored alongside a table (empty if none). Only
+    metadata found on disk is cached, since another process may still
+    build the table.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :param refresh: Re-read the metadata from disk.
+    :return: Metadata dictionary
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    meta = _metadata.get(key)
+    if meta is None or refresh:
+        with _lock:
+            meta_path = os.path.join(table_path(name, path), MetadataFileName)
+            meta = {}
+            if os.path.exists(meta_path):
+                with open(meta_path) as fp:
+                    meta = json.load(fp)
+                _metadata[key] = meta
+            else:
+                _metadata.pop(key, None)
+    return meta
+
+
+def update_metadata(name: str, path: Optional[str] = None, **values) -> dict:
+    """
+    Merges values into the metadata stored alongside a table.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :param values: Metadata keys and values to store
+    :return: Updated metadata dictionary
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    with _lock:
+        meta = dict(get_metadata(name, path), **values)
+        meta_path = os.path.join(table_path(name, path), MetadataFileName)
+        temp_path = f"{meta_path}.tmp"
+        with open(temp_path, "w") as fp:
+            json.dump(meta, fp, indent=2)
+        os.replace(temp_path, meta_path)
+        _metadata[key] = meta
+    return meta
+
+
+def table_lock(name: str, path: Optional[str] = None) -> threading.RLock:
+    """
+    Returns a lock used to serialize the build of a table across threads.
+
+    :param name: Table name
+    :param path: Database directory (default: const.StoredValidatorPath)
+    :return: Re-entrant lock dedicated to the table
+    """
+    _check_fork()
+    key = (_get_path(path), name)
+
+    with _lock:
+        lock = _table_locks.get(key)
+        if lock is None:
+            lock = _table_locks[key] = threading.RLock()
+    return lock
+
+
+def reset() -> None:
+    """Forget all connections and table handles."""
+    _check_fork()
+    with _lock:
+        _connections.clear()
+        _table_names.clear()
+        _tables.clear()
+        _table_locks.clear()
+        _metadata.clear()
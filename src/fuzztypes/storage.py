@@ -1,8 +1,61 @@
-from typing import Any, Callable, Dict, Iterable, List, Optional, Type, Union
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 
 from pydantic_core import PydanticCustomError
 
-from fuzztypes import NamedEntity, MatchResult, const, flags, lazy
+from fuzztypes import (
+    Match,
+    NamedEntity,
+    MatchResult,
+    Record,
+    const,
+    flags,
+    lazy,
+    logger,
+)
+from fuzztypes.cache import CachedResolution, ResolutionCache
+
+# A search stage returns the matches found for a key.
+Stage = Callable[[str], Union[List[Match], MatchResult]]
+
+# Stages whose winning matches can be learned as aliases.
+LEARNED_STAGES = ("fuzz", "semantic")
+
+# Dictionary lookup stages, run inline: the deadline is only checked
+# before they start (the other stages run on the shared stage pool).
+INLINE_STAGES = ("exact", "norm")
+
+# Cascade step: stage name and minimum top score needed to stop the cascade
+# (None stops it on any match), parsed from strings like "fuzz>=95".
+CascadeStep = Tuple[str, Optional[float]]
+
+# Attributes created by `init_sync`, left out when a storage is pickled.
+SyncAttributes = (
+    "_build_lock",
+    "_build_thread",
+    "_fallback_ready",
+    "_build_done",
+    "_misses_lock",
+    "_learn_lock",
+)
 
 
 class AbstractStorage:
@@ -10,30 +63,49 @@ class AbstractStorage:
         self,
         source: Iterable,
         *,
+        background: bool = False,
+        build_timeout: Optional[float] = None,
+        cascade: Optional[List[str]] = None,
         case_sensitive: bool = False,
+        deadline_ms: Optional[float] = None,
         device: const.DeviceList = "cpu",
         encoder: Union[Callable, str, object] = None,
         entity_type: Type[NamedEntity] = NamedEntity,
         fuzz_scorer: str = "token_sort_ratio",
+        learn: bool = False,
+        learn_limit: int = 10_000,
+        learn_threshold: float = 95.0,
         limit: int = 10,
         min_similarity: float = 80.0,
+        negative_cache_size: int = 0,
+        negative_cache_ttl: float = 300.0,
         notfound_mode: const.NotFoundMode = "raise",
+        resolution_cache: Optional[ResolutionCache] = None,
         search_flag: flags.SearchFlag = flags.DefaultSearch,
+        stage_budgets: Optional[Dict[str, float]] = None,
         tiebreaker_mode: const.TiebreakerMode = "raise",
     ):
-        assert not search_flag.is_hybrid, "Hybrid search not yet supported!"
+        assert cascade or not search_flag.is_hybrid, (
+            "Hybrid search requires a cascade!"
+        )
 
         self.source = source
 
         # options
         self.case_sensitive = case_sensitive
+        self.deadline_ms = deadline_ms
         self.device = device
         self.entity_type = entity_type
+        self.learn = learn
+        self.learn_limit = learn_limit
+        self.learn_threshold = learn_threshold
         self.limit = limit
         self.min_similarity = min_similarity
         self.notfound_mode = notfound_mode
         self.prepped = False
+        self.resolution_cache = resolution_cache
         self.search_flag = search_flag
+        self.stage_budgets = stage_budgets or {}
         self.tiebreaker_mode = tiebreaker_mode
 
         # store string for lazy loading
@@ -41,19 +113,243 @@ class AbstractStorage:
         self._encoder = encoder
         self._vect_dimensions = None
 
+        # background build, see `warmup`
+        self.background = background
+        self.build_timeout = build_timeout
+        self._fallback: Dict[str, List[Record]] = {}
+
+        # recent misses, see `get_misses`
+        self.negative_cache_size = negative_cache_size
+        self.negative_cache_ttl = negative_cache_ttl
+        self._misses: "OrderedDict[str, Tuple[float, List[Match]]]" = (
+            OrderedDict()
+        )
+
+        # learned aliases, see `confirm`
+        self._learned: List[str] = []
+
+        self.init_sync()
+
+        # search stages run by `get`, parsed and checked upfront
+        self.cascade: Optional[List[CascadeStep]] = None
+        if cascade is not None:
+            self.cascade = [parse_cascade_step(step) for step in cascade]
+            names = [name for name, _ in self.stages()]
+            for name, _ in self.cascade:
+                if name not in names:
+                    raise ValueError(
+                        f"Search stage {name!r} is not available, "
+                        f"expected one of {names}"
+                    )
+
+    def init_sync(self) -> None:
+        """Creates the locks, events and build thread (not pickled)."""
+        self._build_lock = threading.Lock()
+        self._build_thread: Optional[threading.Thread] = None
+        self._fallback_ready = threading.Event()
+        self._build_done = threading.Event()
+        self._misses_lock = threading.Lock()
+        self._learn_lock = threading.RLock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for name in SyncAttributes:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.init_sync()
+
     def __call__(self, key: str) -> Optional[Any]:
         entity = self[key]
         return entity.resolve() if entity else None
 
     def __getitem__(self, key: str) -> Optional[NamedEntity]:
+        match_list = self.lookup([key])[0]
+        entity = self.choose(key, match_list)
+        self.flush_learned()
+        return entity
+
+    def get_entities(self, keys: List[str]) -> List[Optional[NamedEntity]]:
+        """Batch version of __getitem__ that resolves keys in bulk."""
+        match_lists = self.lookup(keys)
+        entities = [self.choose(k, ml) for k, ml in zip(keys, match_lists)]
+        self.flush_learned()
+        return entities
+
+    def lookup(self, keys: List[str]) -> List[MatchResult]:
+        if self.background and self._build_thread is None:
+            self.warmup()
+
+        if self.is_building:
+            return self.get_while_building(keys)
+
+        self.prepare_if_necessary()
+        if not self.negative_cache_size:
+            return self.search(keys)
+
+        norm_keys = [self.normalize(key) or "" for key in keys]
+        misses = self.get_misses(norm_keys)
+
+        others = [k for k, nk in zip(keys, norm_keys) if nk not in misses]
+        found = dict(zip(others, self.search(others))) if others else {}
+        self.add_misses(found)
+
+        results = []
+        for key, norm_key in zip(keys, norm_keys):
+            if key in found:
+                results.append(found[key])
+            else:
+                matches = [
+                    match.model_copy(update=dict(key=key))
+                    for match in misses[norm_key]
+                ]
+                results.append(MatchResult(matches=matches, stage="miss"))
+        return results
+
+    def search(self, keys: List[str]) -> List[MatchResult]:
+        if self.resolution_cache is not None:
+            return self.get_cached(keys)
+        if len(keys) == 1:
+            return [self.get(keys[0])]
+        return self.get_many(keys)
+
+    def prepare_if_necessary(self):
         if not self.prepped:
             self.prepped = True
             self.prepare()
 
-        match_list = self.get(key)
+    #
+    # background build
+    #
+
+    def warmup(self) -> None:
+        """
+        Prepares the storage ahead of the first lookup. With `background`
+        enabled, the build runs in a daemon thread and lookups are served
+        in degraded mode until it completes.
+        """
+        if not self.background:
+            self.prepare_if_necessary()
+            return
+
+        with self._build_lock:
+            if self._build_thread is None and not self.prepped:
+                self._build_thread = threading.Thread(
+                    target=self.build,
+                    name=f"fuzztypes-build-{id(self):x}",
+                    daemon=True,
+                )
+                self._build_thread.start()
+
+    @property
+    def is_building(self) -> bool:
+        thread = self._build_thread
+        return thread is not None and thread.is_alive()
+
+    def build(self) -> None:
+        """Background build: exact/alias fallback map, then the storage."""
+        try:
+            if self.needs_fallback():
+                self.prepare_fallback()
+            self._fallback_ready.set()
+            self.prepare_if_necessary()
+            self.preload()
+        except Exception as e:
+            # lookups will retry the build (and raise) in the foreground
+            self.prepped = False
+            logger.warning(f"Background build failed: {e}")
+        finally:
+            # set before the map is cleared, see `get_while_building`
+            self._build_done.set()
+            self._fallback_ready.set()
+            self._fallback = {}
+
+    def needs_fallback(self) -> bool:
+        """Whether the build is slow enough to warrant a fallback map."""
+        return True
+
+    def prepare_fallback(self) -> None:
+        fallback: Dict[str, List[Record]] = {}
+
+        for item in self.source:
+            entity = self.entity_type.convert(item)
+            terms = []
+            if self.search_flag.is_name_ok:
+                terms.append((entity.value, False))
+            if self.search_flag.is_alias_ok:
+                terms += [(alias, True) for alias in entity.aliases]
+
+            for term, is_alias in terms:
+                norm_term = self.normalize(term)
+                record = Record(
+                    entity=entity,
+                    term=term,
+                    norm_term=norm_term,
+                    is_alias=is_alias,
+                )
+                fallback.setdefault(norm_term, []).append(record)
+
+        self._fallback = fallback
+
+    def preload(self) -> None:
+        """Loads lazily built structures as part of the background build."""
+
+    def wait_for_build(self) -> bool:
+        """
+        Waits (up to `build_timeout` seconds) for the background build.
+
+        :return: True if the build is no longer running.
+        """
+        thread = self._build_thread
+        if thread is not None:
+            thread.join(self.build_timeout)
+        return not self.is_building
+
+    def get_while_building(self, keys: List[str]) -> List[MatchResult]:
+        """
+        Degraded lookups: exact and alias terms are served from the fallback
+        map, other keys wait for the build or are left not found.
+        """
+        results = []
+        for key in keys:
+            records = self._fallback.get(self.normalize(key), [])
+            matches = Record.from_list(
+                records, key=key, entity_type=self.entity_type
+            )
+            results.append(MatchResult(matches=matches))
+
+        if all(results):
+            return results
+
+        # fallback map is cleared once the build is done (thread may still
+        # be alive), run the full lookup instead
+        if self._build_done.is_set():
+            self.prepare_if_necessary()
+            return self.get_many(keys)
+
+        # exact misses are final once the fallback map is complete
+        is_final = not self.search_flag.is_fuzz_or_semantic_ok
+        if is_final and self._fallback_ready.is_set():
+            return results
+
+        if self.wait_for_build():
+            self.prepare_if_necessary()
+            return self.get_many(keys)
+
+        return results
+
+    def choose(
+        self, key: str, match_list: MatchResult
+    ) -> Optional[NamedEntity]:
         match_list.choose(self.min_similarity, self.tiebreaker_mode)
 
         if match_list.choice is not None:
+            if self.learn and match_list.stage in LEARNED_STAGES:
+                if match_list.choice.score >= self.learn_threshold:
+                    entity = cast(NamedEntity, match_list.choice.entity)
+                    self.confirm(key, entity, flush=False)
             return match_list.entity
 
         if self.notfound_mode == "allow":
@@ -64,6 +360,9 @@ class AbstractStorage:
 
         msg = '"{key}" could not be resolved'
         ctx: Dict[str, Any] = dict(key=key)
+        if match_list.cut_stage is not None:
+            msg += " ({cut_stage} search timed out)"
+            ctx["cut_stage"] = match_list.cut_stage
         if match_list:
             near = [f'"{match.entity.value}"' for match in match_list.matches]
             if len(near) > 1:
@@ -74,9 +373,299 @@ class AbstractStorage:
     def prepare(self):
         raise NotImplementedError
 
-    def get(self, key: str) -> MatchResult:
+    #
+    # negative cache
+    #
+
+    def get_misses(self, norm_keys: List[str]) -> Dict[str, List[Match]]:
+        """
+        Recent misses among keys, served without searching again.
+
+        :param norm_keys: Normalized keys.
+        :return: Near misses of each key not found within the TTL.
+        """
+        now = time.monotonic()
+        misses = {}
+        with self._misses_lock:
+            for norm_key in norm_keys:
+                entry = self._misses.get(norm_key)
+                if entry is None:
+                    continue
+                created, matches = entry
+                if now - created > self.negative_cache_ttl:
+                    del self._misses[norm_key]
+                else:
+                    misses[norm_key] = matches
+        return misses
+
+    def add_misses(self, found: Dict[str, MatchResult]) -> None:
+        """
+        Remembers the keys not found, bounded by `negative_cache_size`
+        (oldest evicted first). Lookups cut short by the deadline are not
+        final and are not remembered.
+        """
+        now = time.monotonic()
+        with self._misses_lock:
+            for key, match_list in found.items():
+                if match_list.cut_stage is not None:
+                    continue
+                match_list.choose(self.min_similarity, self.tiebreaker_mode)
+                if match_list.choice is None:
+                    norm_key = self.normalize(key) or ""
+                    self._misses[norm_key] = (now, match_list.matches)
+                    self._misses.move_to_end(norm_key)
+
+            while len(self._misses) > self.negative_cache_size:
+                self._misses.popitem(last=False)
+
+    def clear_misses(self) -> None:
+        with self._misses_lock:
+            self._misses.clear()
+
+    #
+    # resolution cache
+    #
+
+    @property
+    def source_identity(self) -> str:
+        """Identifies the data searched, changes whenever it is rebuilt."""
+        raise NotImplementedError
+
+    @property
+    def cache_identity(self) -> str:
+        """Identifies the outcomes of lookups in the resolution cache."""
+        entity_type = self.entity_type
+        config = dict(
+            source=self.source_identity,
+            case_sensitive=self.case_sensitive,
+            cascade=self.cascade,
+            encoder=self.encoder_name,
+            entity=f"{entity_type.__module__}.{entity_type.__qualname__}",
+            fuzz_scorer=self._fuzz_scorer,
+            limit=self.limit,
+            min_similarity=self.min_similarity,
+            notfound_mode=self.notfound_mode,
+            search_flag=self.search_flag.value,
+            tiebreaker_mode=self.tiebreaker_mode,
+        )
+        data = json.dumps(config, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    def get_cached(self, keys: List[str]) -> List[MatchResult]:
+        """
+        Looks up keys in the resolution cache, then searches the others and
+        caches their outcome: the chosen entity, or the near misses of keys
+        not found. Lookups cut short by the deadline are not cached.
+        """
+        cache = self.resolution_cache
+        assert cache is not None
+
+        identity = self.cache_identity
+        norm_keys = [self.cache_key(key) for key in keys]
+        cached = cache.get_many(identity, norm_keys)
+
+        missing = [k for k, nk in zip(keys, norm_keys) if nk not in cached]
+        missing = list(dict.fromkeys(missing))
+        if len(missing) == 1:
+            found = dict(zip(missing, [self.get(missing[0])]))
+        else:
+            found = dict(zip(missing, self.get_many(missing)))
+
+        outcomes = {}
+        for key, match_list in found.items():
+            if match_list.cut_stage is None:
+                match_list.choose(self.min_similarity, self.tiebreaker_mode)
+                outcomes[self.cache_key(key)] = to_cached(match_list)
+        cache.put_many(identity, outcomes)
+
+        results = []
+        for key, norm_key in zip(keys, norm_keys):
+            if key in found:
+                results.append(found[key])
+            else:
+                outcome = cached[norm_key]
+                results.append(self.from_cached(key, outcome))
+        return results
+
+    def forget_cached(self, keys: List[str]) -> None:
+        """Deletes the cached outcomes of keys, if caching resolutions."""
+        if self.resolution_cache is not None:
+            cache_keys = [self.cache_key(key) for key in keys]
+            self.resolution_cache.delete(self.cache_identity, cache_keys)
+
+    def cache_key(self, key: str) -> str:
+        """
+        Key of a lookup's outcome in the resolution cache: the key itself
+        if the cascade has the case-exact "exact" stage (or the storage is
+        case sensitive), as keys differing only by case can then resolve
+        to different entities, else the normalized key.
+        """
+        names = [name for name, _ in self.cascade or self.default_cascade]
+        if self.case_sensitive or "exact" in names:
+            return key
+        return self.normalize(key) or ""
+
+    def from_cached(self, key: str, outcome: CachedResolution) -> MatchResult:
+        entity_json, score, near = outcome
+        if entity_json is not None:
+            # chosen outcomes always carry the score of their choice
+            assert score is not None
+            entity = self.entity_type.model_validate_json(entity_json)
+            matches = [Match(key=key, entity=entity, score=score)]
+        else:
+            # near misses only carry the value shown by "did you mean"
+            construct = self.entity_type.model_construct
+            matches = [
+                Match(key=key, entity=construct(value=value), score=score)
+                for value, score in near
+            ]
+        return MatchResult(matches=matches, stage="cache")
+
+    #
+    # learned aliases
+    #
+
+    def confirm(
+        self, key: str, entity: Union[NamedEntity, str], flush: bool = True
+    ) -> bool:
+        """
+        Records a key as a learned alias of an entity, so later lookups of
+        the key take the exact path. Past `learn_limit`, the oldest
+        learned aliases are evicted.
+
+        :param key: Key to learn (e.g. a recurring misspelling).
+        :param entity: Entity, or value of the entity, the key resolves to.
+        :param flush: Write the alias now rather than with the next lookup.
+        :return: True if learned, False if the key already matches a term.
+        """
+        self.prepare_if_necessary()
+
+        resolved: NamedEntity
+        if isinstance(entity, str):
+            matches = self.get_by_norm_term(entity)
+            found = [m.entity for m in matches if m.entity.value == entity]
+            if not found:
+                raise KeyError(f"Entity not found: {entity}")
+            resolved = cast(NamedEntity, found[0])
+        else:
+            resolved = entity
+
+        with self.learn_lock:
+            if not key or self.get_by_norm_term(key):
+                return False
+
+            # the key may have been remembered as a miss
+            self.clear_misses()
+
+            learned = self.learned_aliases()
+            if key in learned:
+                # learned by the current batch, not yet flushed
+                return False
+
+            self.add_learned(key, resolved)
+            learned.append(key)
+
+            evicted = max(0, len(learned) - self.learn_limit)
+            for old_key in learned[:evicted]:
+                self.remove_learned(old_key)
+            self.save_learned(learned[evicted:])
+
+            # cached outcomes of the learned and evicted keys are stale
+            self.forget_cached([key, *learned[:evicted]])
+
+        if flush:
+            self.flush_learned()
+        return True
+
+    @property
+    def learn_lock(self) -> threading.RLock:
+        return self._learn_lock
+
+    def learned_aliases(self) -> List[str]:
+        """Learned alias keys, oldest first."""
+        return list(self._learned)
+
+    def save_learned(self, keys: List[str]) -> None:
+        self._learned = keys
+
+    def add_learned(self, key: str, entity: NamedEntity) -> None:
+        raise NotImplementedError
+
+    def remove_learned(self, key: str) -> None:
         raise NotImplementedError
 
+    def flush_learned(self) -> None:
+        """Writes the aliases learned by the last lookups, if buffered."""
+
+    def get_by_norm_term(self, key: str) -> List[Match]:
+        raise NotImplementedError
+
+    def stages(self) -> List[Tuple[str, Stage]]:
+        """Search stages (name, function) run in order by `get`."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> MatchResult:
+        """
+        Runs the search stages of the cascade in order. A stage that finds
+        matches stops the cascade, unless its top score is below the
+        stage's threshold, in which case its matches are merged with those
+        of the following stages. The cascade is also stopped when the
+        lookup's time budget is spent.
+
+        :param key: Key to look up.
+        :return: MatchResult, with cut_stage set if a stage was cut short.
+        """
+        results = MatchResult()
+        start = time.perf_counter()
+
+        stages = dict(self.stages())
+        for name, threshold in self.cascade or self.default_cascade:
+            timeout = self.stage_timeout(name, start)
+            inline = name in INLINE_STAGES
+            matches = run_stage(stages[name], key, timeout, inline=inline)
+            if matches is None:
+                results.cut_stage = name
+                break
+
+            if matches:
+                if results:
+                    matches = merge_matches(results.matches, matches)
+                    matches = matches[: self.limit]
+                results = MatchResult(matches=matches)
+
+                top_score = max(match.score for match in matches)
+                results.stage = name
+
+                if threshold is None or top_score >= threshold:
+                    break
+
+        return results
+
+    @property
+    def default_cascade(self) -> List[CascadeStep]:
+        """All stages in order, stopping at the first one that matches."""
+        return [(name, None) for name, _ in self.stages()]
+
+    @property
+    def has_deadline(self) -> bool:
+        return self.deadline_ms is not None or bool(self.stage_budgets)
+
+    def stage_timeout(self, name: str, start: float) -> Optional[float]:
+        """
+        Seconds left for a stage: the smaller of the time remaining before
+        `deadline_ms` and the stage's own budget (None if unlimited).
+        """
+        timeouts = []
+        if self.deadline_ms is not None:
+            elapsed = time.perf_counter() - start
+            timeouts.append(self.deadline_ms / 1000 - elapsed)
+        if name in self.stage_budgets:
+            timeouts.append(self.stage_budgets[name] / 1000)
+        return min(timeouts) if timeouts else None
+
+    def get_many(self, keys: List[str]) -> List[MatchResult]:
+        return [self.get(key) for key in keys]
+
     def normalize(self, key: str):
         if key:
             key = key.strip()
@@ -93,6 +682,17 @@ class AbstractStorage:
     def encoder(self):
         return lazy.create_encoder(self._encoder, device=self.device)
 
+    @property
+    def encoder_name(self) -> Optional[str]:
+        """Name of the semantic encoder (None if not semantic)."""
+        if not self.search_flag.is_semantic_ok:
+            return None
+        encoder = self._encoder or const.DefaultEncoder
+        if not isinstance(encoder, str):
+            encoder_type = type(encoder)
+            encoder = f"{encoder_type.__module__}.{encoder_type.__name__}"
+        return encoder
+
     @property
     def vect_dimensions(self):
         if self._vect_dimensions is None:
@@ -119,7 +719,143 @@ class AbstractStorage:
             self.rapidfuzz.fuzz.token_sort_ratio,
         )
 
+    @property
+    def score_cutoff(self) -> float:
+        """Minimum score of matches, near misses are only used to raise."""
+        return 0.0 if self.notfound_mode == "raise" else self.min_similarity
+
     def fuzz_clean(self, term: str) -> str:
         # no really, it's a string
         # noinspection PyTypeChecker
         return self.rapidfuzz.utils.default_process(term)
+
+
+#
+# search stages
+#
+
+STAGE_WORKERS = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+# stages submitted to the pool and not yet completed (including those
+# abandoned after timing out), see `submit_stage`
+_stages_running = 0
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Shared pool running stages that have a time budget."""
+    global _executor, _executor_pid, _stages_running
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=STAGE_WORKERS,
+                thread_name_prefix="fuzztypes-stage",
+            )
+            _executor_pid = os.getpid()
+            _stages_running = 0
+    return _executor
+
+
+def submit_stage(stage: Stage, key: str) -> Optional[Future]:
+    """
+    Submits a stage to the shared pool, unless all of its workers are
+    busy (e.g. with stages abandoned after timing out): queueing behind
+    them would spend the lookup's time budget waiting.
+
+    :param stage: Search stage function.
+    :param key: Key to look up.
+    :return: Future of the stage's matches, None if the pool is saturated.
+    """
+    global _stages_running
+
+    executor = get_executor()
+    with _executor_lock:
+        if _stages_running >= STAGE_WORKERS:
+            return None
+        _stages_running += 1
+
+    future = executor.submit(stage, key)
+    future.add_done_callback(stage_done)
+    return future
+
+
+def stage_done(future: Future) -> None:
+    global _stages_running
+
+    with _executor_lock:
+        _stages_running = max(0, _stages_running - 1)
+
+
+def run_stage(
+    stage: Stage, key: str, timeout: Optional[float], inline: bool = False
+) -> Optional[List[Match]]:
+    """
+    Runs a search stage, giving up after timeout seconds. A stage that
+    times out keeps running in the background, its result is discarded.
+
+    :param stage: Search stage function.
+    :param key: Key to look up.
+    :param timeout: Seconds allowed, None waits for the stage to complete.
+    :param inline: Run in the calling thread, only checking the timeout
+                   before the stage starts (for cheap stages).
+    :return: Matches found, None if the stage timed out (or the shared
+             pool is saturated).
+    """
+    if timeout is None or (inline and timeout > 0):
+        matches = stage(key)
+    elif timeout <= 0:
+        return None
+    else:
+        future = submit_stage(stage, key)
+        if future is None:
+            return None
+        try:
+            matches = future.result(timeout)
+        except TimeoutError:
+            return None
+
+    if isinstance(matches, MatchResult):
+        matches = matches.matches
+    return matches
+
+
+def to_cached(match_list: MatchResult) -> CachedResolution:
+    """Outcome of a lookup, as stored by the resolution cache."""
+    choice = match_list.choice
+    if choice is not None:
+        return choice.entity.model_dump_json(), choice.score, []
+    near = [[m.entity.value, m.score] for m in match_list.matches]
+    return None, None, near
+
+
+def parse_cascade_step(step: str) -> CascadeStep:
+    """
+    Parses a cascade step such as "semantic" or "fuzz>=95".
+
+    :param step: Stage name, optionally followed by >= and a threshold.
+    :return: Stage name and threshold (None if not specified).
+    """
+    match = re.fullmatch(r"\s*(\w+)\s*(?:>=\s*(\d+(?:\.\d*)?)\s*)?", step)
+    if match is None:
+        raise ValueError(f"Invalid cascade step: {step!r}")
+
+    name, threshold = match.groups()
+    return name, None if threshold is None else float(threshold)
+
+
+def merge_matches(*match_lists: List[Match]) -> List[Match]:
+    """
+    Merges the matches of several stages, keeping the best match of each
+    entity, sorted by rank.
+    """
+    best: Dict[Any, Match] = {}
+    for match_list in match_lists:
+        for match in match_list:
+            current = best.get(match.entity.value)
+            if current is None or match < current:
+                best[match.entity.value] = match
+    return sorted(best.values())
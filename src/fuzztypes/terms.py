@@ -0,0 +1,103 @@
+from array import array
+from typing import Dict, Sequence, Union
+
+# Row ids of a key: a single row id, or an int32 array when it has several.
+RowIds = Union[int, array]
+
+
+class TermStore:
+    """
+    Struct-of-arrays store of (term, entity id, is_alias) rows grouped by
+    key (e.g. normalized term), used by in-memory storages.
+
+    Terms are kept in one UTF-8 buffer with an offsets array, entity ids in
+    an int32 array and alias flags in a byte array. Keys map to row ids
+    rather than objects, so millions of rows cost a few bytes each (plus
+    their terms) and the store pickles as a handful of buffers.
+
+    Rows of removed keys are reclaimed by `compact` once they outnumber
+    half of the rows.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.offsets = array("q", [0])
+        self.entity_ids = array("i")
+        self.alias_flags = array("b")
+        self.keys: Dict[str, RowIds] = {}
+        self.removed = 0
+
+    def __len__(self) -> int:
+        return len(self.entity_ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def append(
+        self, key: str, entity_id: int, is_alias: bool, term: str = ""
+    ) -> int:
+        """
+        Adds a row under a key.
+
+        :param key: Key of the row, such as its normalized term.
+        :param entity_id: Index of the row's entity.
+        :param is_alias: Whether the term is an alias of the entity.
+        :param term: Term of the row (empty if the key is enough).
+        :return: Row id.
+        """
+        row = len(self.entity_ids)
+        self.buffer += term.encode("utf-8")
+        self.offsets.append(len(self.buffer))
+        self.entity_ids.append(entity_id)
+        self.alias_flags.append(is_alias)
+
+        row_ids = self.keys.get(key)
+        if row_ids is None:
+            self.keys[key] = row
+        elif isinstance(row_ids, int):
+            self.keys[key] = array("i", (row_ids, row))
+        else:
+            row_ids.append(row)
+        return row
+
+    def remove(self, key: str) -> None:
+        # rows stay in the arrays, unreachable until compacted
+        row_ids = self.keys.pop(key, None)
+        if row_ids is not None:
+            self.removed += 1 if isinstance(row_ids, int) else len(row_ids)
+            if self.removed > len(self) // 2:
+                self.compact()
+
+    def compact(self) -> None:
+        """Rebuilds the arrays without the rows of removed keys."""
+        store = TermStore()
+        for key in self.keys:
+            for row in self.rows(key):
+                store.append(
+                    key,
+                    self.entity_ids[row],
+                    self.is_alias(row),
+                    term=self.term(row),
+                )
+
+        self.buffer = store.buffer
+        self.offsets = store.offsets
+        self.entity_ids = store.entity_ids
+        self.alias_flags = store.alias_flags
+        self.keys = store.keys
+        self.removed = 0
+
+    def rows(self, key: str) -> Sequence[int]:
+        row_ids = self.keys.get(key)
+        if row_ids is None:
+            return ()
+        if isinstance(row_ids, int):
+            return (row_ids,)
+        return row_ids
+
+    def term(self, row: int) -> str:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return self.buffer[start:end].decode("utf-8")
+
+    def is_alias(self, row: int) -> bool:
+        return bool(self.alias_flags[row])
@@ -0,0 +1,169 @@
+import os
+import shutil
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+from fuzztypes import lazy
+
+# Files of a persisted TrigramIndex, all loaded as memory-mapped arrays.
+# keys: sorted trigrams, offsets/postings: term ids of each trigram,
+# counts: number of trigrams of each term, buffer/term_offsets: utf-8 terms
+FileNames = ("keys", "offsets", "postings", "counts", "buffer", "term_offsets")
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Character trigrams of a (cleaned) text, padded to weight word starts.
+
+    :param text: Text cleaned using the same processor as the terms.
+    :return: Set of 3-character strings.
+    """
+    if not text:
+        return set()
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Character-trigram posting index used to generate fuzzy candidates.
+
+    Terms sharing the most trigrams with a query (by Dice coefficient)
+    are returned as candidates, to be re-scored by rapidfuzz. Unlike a
+    whole-token full-text index, typos inside a token still share most of
+    their trigrams with the intended term.
+    """
+
+    def __init__(
+        self,
+        keys: Any,
+        offsets: Any,
+        postings: Any,
+        counts: Any,
+        buffer: Any,
+        term_offsets: Any,
+    ):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self.counts = counts
+        self.buffer = buffer
+        self.term_offsets = term_offsets
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def term(self, index: int) -> str:
+        start, end = self.term_offsets[index], self.term_offsets[index + 1]
+        return bytes(self.buffer[start:end]).decode("utf-8")
+
+    def candidates(self, query: str, limit: int) -> List[str]:
+        """
+        Finds the terms sharing the most trigrams with the query.
+
+        :param query: Query cleaned using the same processor as the terms.
+        :param limit: Maximum number of candidate terms returned.
+        :return: Candidate terms (unordered).
+        """
+        np = lazy.lazy_import("numpy")
+
+        grams = sorted(trigrams(query))
+        positions = np.searchsorted(self.keys, grams)
+
+        lists = []
+        for gram, i in zip(grams, positions):
+            if i < len(self.keys) and self.keys[i] == gram:
+                start, end = self.offsets[i], self.offsets[i + 1]
+                lists.append(self.postings[start:end])
+
+        if not lists:
+            return []
+
+        ids, shared = np.unique(np.concatenate(lists), return_counts=True)
+
+        if len(ids) > limit:
+            # dice coefficient between query and term trigram sets
+            dice = 2 * shared / (len(grams) + self.counts[ids])
+            ids = ids[np.argpartition(-dice, limit)[:limit]]
+
+        return [self.term(i) for i in ids]
+
+    @classmethod
+    def build(
+        cls, terms: Iterable[str], clean: Callable[[str], str]
+    ) -> "TrigramIndex":
+        """
+        Builds an index over the distinct terms.
+
+        :param terms: Terms to index (original form, duplicates ignored).
+        :param clean: Processor applied to terms before computing trigrams.
+        :return: TrigramIndex
+        """
+        np = lazy.lazy_import("numpy")
+
+        posting_lists: Dict[str, List[int]] = defaultdict(list)
+        counts: List[int] = []
+        encoded: List[bytes] = []
+
+        for term in dict.fromkeys(terms):
+            grams = trigrams(clean(term))
+            for gram in grams:
+                posting_lists[gram].append(len(counts))
+            counts.append(len(grams))
+            encoded.append(term.encode("utf-8"))
+
+        keys = sorted(posting_lists)
+        sizes = [len(posting_lists[key]) for key in keys]
+        postings = [i for key in keys for i in posting_lists[key]]
+        term_sizes = [len(term) for term in encoded]
+
+        return cls(
+            keys=np.array(keys, dtype="U3"),
+            offsets=np.cumsum([0] + sizes, dtype=np.int64),
+            postings=np.array(postings, dtype=np.int32),
+            counts=np.array(counts, dtype=np.int32),
+            buffer=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            term_offsets=np.cumsum([0] + term_sizes, dtype=np.int64),
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Saves the index arrays into a directory (replaced atomically).
+
+        :param path: Directory of the index.
+        """
+        np = lazy.lazy_import("numpy")
+
+        temp_path = f"{path}.tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+
+        for name in FileNames:
+            file_path = os.path.join(temp_path, f"{name}.npy")
+            np.save(file_path, getattr(self, name))
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "TrigramIndex":
+        """
+        Loads a saved index, memory-mapping its arrays.
+
+        :param path: Directory of the index.
+        :return: TrigramIndex
+        """
+        np = lazy.lazy_import("numpy")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in FileNames
+        }
+        return cls(**arrays)
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return all(
+            os.path.exists(os.path.join(path, f"{name}.npy"))
+            for name in FileNames
+        )
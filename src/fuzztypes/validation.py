@@ -86,6 +86,12 @@ class FuzzValidator:
         except PydanticCustomError as err:
             raise KeyError(f"Key Error: {key} [{err}]") from err
 
+    def warmup(self) -> None:
+        """Prepares the underlying storage ahead of the first lookup."""
+        warmup = getattr(self.func, "warmup", None)
+        if warmup is not None:
+            warmup()
+
     def __get_pydantic_core_schema__(
         self, source_type: Any, handler: GetCoreSchemaHandler
     ) -> core_schema.CoreSchema:
@@ -81,3 +81,8 @@ def test_duplicate_records():
 
     A = InMemoryValidator(source, tiebreaker_mode="greater")
     assert A["b"].value == "d"
+
+
+def test_get_entities(MythicalFigure):
+    entities = MythicalFigure.func.get_entities(["Zeus", "jove", "Pallas"])
+    assert [e.value for e in entities] == ["Zeus", "Zeus", "Athena"]
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from fuzztypes import InMemoryValidator, flags
+
+
+class SlowSource:
+    """Source whose full build is held until `release` is set."""
+
+    def __init__(self, items):
+        self.items = items
+        self.release = threading.Event()
+        self.iterations = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        if self.iterations > 1:
+            # first pass builds the fallback map, second pass is the build
+            self.release.wait(10)
+        return iter(self.items)
+
+
+@pytest.fixture
+def source():
+    source = SlowSource([("Apple", "Malus"), "Banana"])
+    yield source
+    source.release.set()
+
+
+def test_degraded_mode(source):
+    Fruit = InMemoryValidator(
+        source,
+        background=True,
+        build_timeout=0,
+        notfound_mode="none",
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    assert storage.is_building
+
+    # exact and alias lookups are served while building
+    storage._fallback_ready.wait(10)
+    assert Fruit["apple"].value == "Apple"
+    assert Fruit["Malus"].value == "Apple"
+
+    # fuzzy lookups don't wait for the build
+    assert Fruit["Banan"] is None
+
+    source.release.set()
+    storage._build_thread.join(10)
+    assert not storage.is_building
+    assert Fruit["Banan"].value == "Banana"
+
+
+def test_wait_for_build(source):
+    Fruit = InMemoryValidator(
+        source,
+        background=True,
+        search_flag=flags.FuzzSearch,
+    )
+    Fruit.func._fallback_ready.wait(10)
+    threading.Timer(0.1, source.release.set).start()
+
+    # no timeout, fuzzy lookup waits for the build
+    assert Fruit["Appel"].value == "Apple"
+    assert not Fruit.func.is_building
+
+
+def test_failed_build_is_retried():
+    class BrokenSource:
+        def __iter__(self):
+            raise OSError("unavailable")
+
+    Broken = InMemoryValidator(BrokenSource(), background=True)
+    assert Broken.func.wait_for_build()
+
+    with pytest.raises(OSError):
+        Broken["anything"]
+
+
+def test_lookup_after_fallback_is_cleared(source):
+    Fruit = InMemoryValidator(
+        source, background=True, search_flag=flags.AliasSearch
+    )
+    storage = Fruit.func
+    source.release.set()
+    storage._build_thread.join(10)
+
+    # lookup that saw the thread alive, after the map was cleared
+    results = storage.get_while_building(["apple"])
+    assert results[0][0].entity.value == "Apple"
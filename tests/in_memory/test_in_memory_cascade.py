@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from fuzztypes import InMemoryValidator, flags, storage
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.queries = 0
+
+    def encode(self, texts, device=None):
+        if len(texts) == 1:
+            self.queries += 1
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+@pytest.fixture
+def encoder():
+    return CountingEncoder()
+
+
+@pytest.fixture
+def Fruit(encoder):
+    return InMemoryValidator(
+        ["Apple", "Banana", "Cherry"],
+        cascade=["exact", "norm", "fuzz>=95", "semantic"],
+        encoder=encoder,
+        min_similarity=50.0,
+        notfound_mode="none",
+        search_flag=flags.HybridSearch,
+    )
+
+
+def test_confident_fuzz_skips_semantic(Fruit, encoder):
+    assert Fruit["apple"].value == "Apple"
+    assert Fruit["cherry!"].value == "Cherry"
+    assert encoder.queries == 0
+
+
+def test_weak_fuzz_falls_through(Fruit, encoder):
+    assert Fruit["aple"] is not None
+    assert encoder.queries == 1
+
+    # fuzzy and semantic matches are merged, one per entity
+    results = Fruit.func.get("aple")
+    values = [match.entity.value for match in results.matches]
+    assert len(values) == len(set(values))
+
+
+def test_parse_cascade_step():
+    assert storage.parse_cascade_step("semantic") == ("semantic", None)
+    assert storage.parse_cascade_step("fuzz>=95") == ("fuzz", 95.0)
+    assert storage.parse_cascade_step(" fuzz >= 87.5 ") == ("fuzz", 87.5)
+
+    with pytest.raises(ValueError):
+        storage.parse_cascade_step("fuzz>95")
+
+
+def test_invalid_cascade():
+    with pytest.raises(ValueError, match="not available"):
+        InMemoryValidator(["Apple"], cascade=["exact", "semantic"])
+
+    with pytest.raises(AssertionError):
+        InMemoryValidator(["Apple"], search_flag=flags.HybridSearch)
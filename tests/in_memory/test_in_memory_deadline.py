@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+import pytest
+
+from fuzztypes import InMemoryValidator, flags, storage
+
+
+class SlowEncoder:
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def encode(self, texts, device=None):
+        if texts != [""] and len(texts) == 1:
+            time.sleep(self.delay)  # slow query encoding
+        return np.array([[len(text), 1.0] for text in texts])
+
+
+def create(delay: float = 0.5, **kwargs):
+    return InMemoryValidator(
+        [("Happiness", "Joy"), "Sadness"],
+        encoder=SlowEncoder(delay=delay),
+        search_flag=flags.SemanticSearch,
+        **kwargs,
+    )
+
+
+def test_deadline_cuts_semantic_stage():
+    Emotion = create(deadline_ms=100, notfound_mode="none")
+
+    # exact stage is well within the deadline
+    assert Emotion["joy"].value == "Happiness"
+
+    start = time.perf_counter()
+    assert Emotion["cheerful"] is None
+    assert time.perf_counter() - start < 0.4
+
+    results = Emotion.func.get("cheerful")
+    assert results.cut_stage == "semantic"
+    assert not results
+
+
+def test_exact_hit_with_saturated_pool():
+    Emotion = create(delay=1.0, deadline_ms=100, notfound_mode="none")
+
+    # abandoned semantic stages hold every worker of the shared pool
+    for i in range(storage.STAGE_WORKERS):
+        assert Emotion[f"junk {i}"] is None
+
+    # exact and norm stages run inline, not queued behind them
+    assert Emotion["Happiness"].value == "Happiness"
+    assert Emotion["joy"].value == "Happiness"
+
+    # expensive stages are cut rather than queued
+    start = time.perf_counter()
+    assert Emotion.func.get("cheerful").cut_stage == "semantic"
+    assert time.perf_counter() - start < 0.05
+
+    # let the abandoned stages complete before the next tests
+    while storage._stages_running:
+        time.sleep(0.05)
+
+
+def test_stage_budget_error_message():
+    Emotion = create(stage_budgets=dict(semantic=50))
+
+    with pytest.raises(KeyError) as info:
+        Emotion["cheerful"]
+    assert "semantic search timed out" in str(info.value)
+
+
+def test_no_deadline():
+    Emotion = create(notfound_mode="none", min_similarity=0.0)
+    assert Emotion["cheerful"] is not None
+
+    results = Emotion.func.get("cheerful")
+    assert results.cut_stage is None
+    assert results
@@ -0,0 +1,70 @@
+from fuzztypes import (
+    CompactEntity,
+    InMemoryValidator,
+    NamedEntity,
+    flags,
+)
+from fuzztypes.terms import TermStore
+
+source = [
+    NamedEntity(value="Apple", aliases=["Malus", "Pome"]),
+    NamedEntity(value="apple", aliases=["Pome", "Eve's fruit"]),
+    NamedEntity(value="Pear", aliases=["Pome"]),
+    NamedEntity(value="Banana"),
+    NamedEntity(value="Banana"),
+]
+
+
+def test_duplicate_terms_stored_once():
+    Fruit = InMemoryValidator(source, search_flag=flags.FuzzSearch)
+    storage = Fruit.func
+    storage.prepare_if_necessary()
+
+    # "pome" of Apple, apple and Pear, "banana" of both Bananas
+    assert storage._terms.count("pome") == 1
+    assert storage._terms.count("banana") == 1
+    assert len(storage._records.rows("banana")) == 1
+
+    assert storage.collisions == {
+        "apple": ["Apple", "apple"],
+        "pome": ["Apple", "apple", "Pear"],
+    }
+
+    matches = storage.get_by_fuzz("pome").matches
+    values = [m.entity.value for m in matches]
+    assert values[:3] == ["Apple", "apple", "Pear"]
+
+    # entities are held compact, matches get full entities
+    assert all(isinstance(e, CompactEntity) for e in storage._entities)
+    assert all(type(m.entity) is NamedEntity for m in matches)
+
+
+def test_merge_entities():
+    Fruit = InMemoryValidator(
+        source,
+        merge_entities=True,
+        notfound_mode="none",
+        search_flag=flags.FuzzSearch,
+    )
+    apple = Fruit["eve's fruit"]
+    assert apple.value == "Apple"
+    # differing value is kept as an alias for exact matching
+    assert apple.aliases == ["Malus", "Pome", "Eve's fruit", "apple"]
+
+    assert Fruit.func.collisions == {"pome": ["Apple", "Pear"]}
+
+
+def test_shared_alias_ingested_without_decoding(monkeypatch):
+    def term(self, row):
+        raise AssertionError("term decoded while preparing")
+
+    # duplicates are found without reading back the rows of the term
+    monkeypatch.setattr(TermStore, "term", term)
+
+    source = [[f"Entity {i}", "unknown"] for i in range(2_000)]
+    Name = InMemoryValidator(source, search_flag=flags.FuzzSearch)
+    storage = Name.func
+    storage.prepare_if_necessary()
+
+    assert len(storage._records.rows("unknown")) == 2_000
+    assert len(storage._postings.rows("unknown")) == 2_000
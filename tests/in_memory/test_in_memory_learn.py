@@ -0,0 +1,83 @@
+import pytest
+
+from fuzztypes import InMemoryValidator, ResolutionCache, flags
+
+
+@pytest.fixture
+def Fruit():
+    return InMemoryValidator(
+        ["Apple", "Banana", "Cherry"],
+        learn=True,
+        learn_limit=2,
+        learn_threshold=80.0,
+        search_flag=flags.FuzzSearch,
+    )
+
+
+def test_learn_confident_fuzzy_match(Fruit):
+    assert Fruit["appel"].value == "Apple"
+
+    # learned alias now takes the exact path
+    results = Fruit.func.get("appel")
+    assert results.stage == "exact"
+    assert Fruit.func.learned_aliases() == ["appel"]
+
+
+def test_learn_threshold(Fruit):
+    Fruit.func.learn_threshold = 100.0
+    assert Fruit["appel"].value == "Apple"
+    assert Fruit.func.learned_aliases() == []
+
+
+def test_confirm_and_evict(Fruit):
+    storage = Fruit.func
+    assert storage.confirm("Bnana", "Banana")
+    assert storage.confirm("chery", Fruit["cherry"])
+    assert not storage.confirm("banana", "Banana")  # already a term
+
+    with pytest.raises(KeyError):
+        storage.confirm("durian", "Durian")
+
+    # learn_limit reached, oldest learned alias is evicted
+    assert storage.confirm("aple", "Apple")
+    assert storage.learned_aliases() == ["chery", "aple"]
+    assert storage.get("bnana").stage == "fuzz"
+    assert storage.get("chery").stage == "exact"
+
+
+def test_evicted_aliases_are_reclaimed(Fruit):
+    storage = Fruit.func
+    storage.prepare_if_necessary()
+    num_rows = len(storage._records)
+
+    for i in range(50):
+        assert storage.confirm(f"aple{i}", "Apple")
+
+    # learned aliases reuse the entity, evicted rows are compacted
+    assert len(storage._entities) == 3
+    assert len(storage._records) <= 2 * (num_rows + storage.learn_limit)
+    assert storage.learned_aliases() == ["aple48", "aple49"]
+    assert storage.get("aple49").stage == "exact"
+
+
+def test_confirm_with_resolution_cache(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "cache.sqlite3"))
+    City = InMemoryValidator(
+        ["Paris", "London"],
+        learn=True,
+        learn_limit=1,
+        negative_cache_size=10,
+        notfound_mode="none",
+        resolution_cache=cache,
+    )
+    identity = City.func.cache_identity
+    assert City["Lutece"] is None
+    assert "Lutece" in cache.get_many(identity, ["Lutece"])
+
+    # cached outcomes of learned keys are deleted
+    assert City.func.confirm("Lutece", "Paris")
+    assert City["Lutece"].value == "Paris"
+
+    # ... and those of evicted keys
+    assert City.func.confirm("Londinium", "London")
+    assert City["Lutece"] is None
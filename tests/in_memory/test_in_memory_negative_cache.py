@@ -0,0 +1,46 @@
+import pytest
+
+from fuzztypes import InMemoryValidator, flags
+
+
+def test_recent_misses():
+    Fruit = InMemoryValidator(
+        ["Apple", "Banana"],
+        negative_cache_size=2,
+        notfound_mode="none",
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    assert Fruit["xyz-123"] is None
+    assert storage.lookup(["XYZ-123"])[0].stage == "miss"
+    assert Fruit["XYZ-123"] is None
+
+    # hits are not remembered
+    assert Fruit["appel"].value == "Apple"
+    assert storage.lookup(["appel"])[0].stage == "fuzz"
+
+    # bounded by negative_cache_size, oldest evicted first
+    assert Fruit["foo"] is None
+    assert Fruit["bar"] is None
+    assert storage.lookup(["xyz-123"])[0].stage != "miss"
+
+    # expired after negative_cache_ttl
+    storage.negative_cache_ttl = 0.0
+    assert storage.lookup(["bar"])[0].stage != "miss"
+
+
+def test_miss_message_and_confirm():
+    Fruit = InMemoryValidator(
+        ["Apple", "Banana"],
+        negative_cache_size=10,
+        search_flag=flags.FuzzSearch,
+    )
+    with pytest.raises(KeyError) as first:
+        assert Fruit["zzz"]
+    with pytest.raises(KeyError) as second:
+        assert Fruit["zzz"]
+    assert str(first.value) == str(second.value)
+
+    # confirming a key forgets the misses
+    assert Fruit.func.confirm("zzz", "Banana")
+    assert Fruit["zzz"].value == "Banana"
@@ -0,0 +1,26 @@
+import pickle
+
+from fuzztypes import InMemoryValidator, ResolutionCache, flags
+
+
+def test_pickle_round_trip(tmp_path):
+    Fruit = InMemoryValidator(
+        [("Apple", "Malus"), "Banana"],
+        background=True,
+        learn=True,
+        negative_cache_size=10,
+        notfound_mode="none",
+        resolution_cache=ResolutionCache(str(tmp_path / "cache.sqlite3")),
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    assert storage.wait_for_build()
+    assert storage["malus"].value == "Apple"
+
+    copy = pickle.loads(pickle.dumps(storage))
+    assert copy.prepped and not copy.is_building
+    assert copy["malus"].value == "Apple"
+    assert copy["banan"].value == "Banana"
+    assert copy.confirm("bnana", "Banana")
+    assert copy.learned_aliases() == ["bnana"]
+    assert copy["durian"] is None
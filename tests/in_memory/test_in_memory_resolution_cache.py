@@ -0,0 +1,83 @@
+from typing import Annotated
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from fuzztypes import InMemoryValidator, ResolutionCache, flags
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResolutionCache(path=str(tmp_path / "cache.sqlite3"))
+
+
+def test_cached_outcomes(cache):
+    Fruit = InMemoryValidator(
+        ["Apple", "Banana"],
+        resolution_cache=cache,
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    assert Fruit["appel"].value == "Apple"
+    with pytest.raises(KeyError):
+        assert Fruit["durian"]
+
+    identity = storage.cache_identity
+    assert set(cache.get_many(identity, ["appel", "durian"])) == {
+        "appel",
+        "durian",
+    }
+
+    # served from the cache, including the not-found message
+    results = storage.lookup(["appel"])[0]
+    assert results.stage == "cache"
+    assert storage.choose("appel", results).value == "Apple"
+
+    class Model(BaseModel):
+        fruit: Annotated[str, Fruit]
+
+    with pytest.raises(ValidationError) as exc_info:
+        Model(fruit="durian")
+    assert "did you mean" in str(exc_info.value)
+
+
+def test_invalidated_by_source_and_options(cache):
+    Fruit = InMemoryValidator(["Apple"], resolution_cache=cache)
+    assert Fruit["apple"].value == "Apple"
+
+    Other = InMemoryValidator(["Apple", "Banana"], resolution_cache=cache)
+    Loose = InMemoryValidator(
+        ["Apple"], min_similarity=50.0, resolution_cache=cache
+    )
+    identities = {
+        Fruit.func.cache_identity,
+        Other.func.cache_identity,
+        Loose.func.cache_identity,
+    }
+    assert len(identities) == 3
+
+
+def test_keys_differing_by_case(cache):
+    rows = [["Apple", "fruit"], ["APPLE", "company"]]
+    Name = InMemoryValidator(rows, resolution_cache=cache)
+    assert Name["Apple"].value == "Apple"
+    assert Name["APPLE"].value == "APPLE"
+
+    # case-exact outcomes are cached by key, not by normalized key
+    results = Name.func.lookup(["APPLE"])[0]
+    assert results.stage == "cache"
+    assert Name.func.choose("APPLE", results).value == "APPLE"
+
+
+def test_normalized_keys_without_exact_stage(cache):
+    Fruit = InMemoryValidator(
+        ["Apple", "Banana"],
+        cascade=["norm", "fuzz"],
+        resolution_cache=cache,
+        search_flag=flags.FuzzSearch,
+    )
+    assert Fruit["appel"].value == "Apple"
+
+    results = Fruit.func.lookup(["Appel"])[0]
+    assert results.stage == "cache"
+    assert Fruit.func.choose("Appel", results).value == "Apple"
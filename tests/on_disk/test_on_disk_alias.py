@@ -1,9 +1,14 @@
+import subprocess
+import sys
 from typing import Annotated
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from pydantic import BaseModel, ValidationError
+from pydantic_core import PydanticCustomError
 
-from fuzztypes import OnDiskValidator, flags
+from fuzztypes import EntitySource, OnDiskValidator, flags, on_disk, pool
 
 
 @pytest.fixture(scope="session")
@@ -30,6 +35,20 @@ def test_alias_uncased_getitem(MythicalFigure):
     assert MythicalFigure["athena"].value == "Athena"  # case insensitivity
 
 
+def test_no_vector_column(MythicalFigure):
+    assert MythicalFigure["Zeus"].value == "Zeus"
+    storage = MythicalFigure.func
+    assert "vector" not in storage.table.schema.names
+    assert "dimensions" not in pool.get_metadata(storage.name)
+
+
+def test_scalar_indexes(MythicalFigure):
+    assert MythicalFigure["Zeus"].value == "Zeus"
+    indices = MythicalFigure.func.table.to_lance().list_indices()
+    fields = {field for index in indices for field in index["fields"]}
+    assert {"term", "norm_term"} <= fields
+
+
 def test_alias_cased_getitem(CasedMythicalFigure):
     # Testing AliasCasedStr, expecting case-sensitive behavior
     assert CasedMythicalFigure["Athena"].value == "Athena"
@@ -84,3 +103,135 @@ def test_duplicate_records():
 
     A = OnDiskValidator("DupeRec", source, tiebreaker_mode="greater")
     assert A["b"].value == "d"
+
+
+def test_get_many(MythicalFigure):
+    storage = MythicalFigure.func
+    keys = ["Zeus", "jove", "Pallas", "Zeus", "Unknown"]
+
+    results = storage.get_many(keys)
+    assert [len(result) for result in results] == [1, 1, 1, 1, 0]
+    assert [result[0].key for result in results[:4]] == keys[:4]
+    assert results[2][0].entity.value == "Athena"
+
+    with pytest.raises(PydanticCustomError):
+        storage.get_entities(keys)
+
+    entities = storage.get_entities(keys[:4])
+    assert [e.value for e in entities] == ["Zeus", "Zeus", "Athena", "Zeus"]
+
+
+def test_background_build(MythSource):
+    if "BackgroundFigure" in pool.table_names():
+        pool.drop_table("BackgroundFigure")
+
+    BackgroundFigure = OnDiskValidator(
+        "BackgroundFigure",
+        MythSource,
+        background=True,
+        search_flag=flags.AliasSearch,
+    )
+    assert BackgroundFigure["Ulysses"].value == "Odysseus"
+
+    assert BackgroundFigure.func.wait_for_build()
+    assert "BackgroundFigure" in pool.table_names()
+    assert BackgroundFigure["athena"].value == "Athena"
+
+
+OtherProcessBuild = """
+from fuzztypes import OnDiskValidator, flags
+
+Fruit = OnDiskValidator(
+    "OtherProcessFruit", ["Apple", "Banana"], search_flag=flags.AliasSearch
+)
+Fruit.func.prepare_if_necessary()
+"""
+
+
+def test_table_built_by_other_process():
+    if "OtherProcessFruit" in pool.table_names(refresh=True):
+        pool.drop_table("OtherProcessFruit")
+
+    Fruit = OnDiskValidator(
+        "OtherProcessFruit", ["Apple", "Banana"], search_flag=flags.AliasSearch
+    )
+    assert "OtherProcessFruit" not in pool.table_names()
+
+    # table is built by another process after names were listed
+    subprocess.run([sys.executable, "-c", OtherProcessBuild], check=True)
+
+    Fruit.func.prepare_if_necessary()
+    assert Fruit.func.table.count_rows() == 2
+    assert Fruit["banana"].value == "Banana"
+
+
+def test_outdated_table_is_rebuilt(MythSource):
+    def create():
+        return OnDiskValidator(
+            "OutdatedFigure", MythSource, search_flag=flags.AliasSearch
+        )
+
+    assert create()["Jove"].value == "Zeus"
+    pool.update_metadata("OutdatedFigure", fingerprint="outdated")
+
+    Rebuilt = create()
+    assert Rebuilt["Jove"].value == "Zeus"
+    assert Rebuilt.func.is_current
+
+
+def test_streaming_build(data_path, monkeypatch):
+    monkeypatch.setattr(on_disk, "RECORD_BATCH_SIZE", 2)
+
+    source = EntitySource(data_path / "myths.tsv", stream=True, chunk_size=2)
+    StreamedFigure = OnDiskValidator(
+        "StreamedFigure", source, search_flag=flags.AliasSearch
+    )
+    StreamedFigure.func.prepare(force_drop_table=True)
+    assert StreamedFigure["Jove"].value == "Zeus"
+    assert StreamedFigure.func.table.count_rows() > 2
+    assert source.loaded is False
+
+
+def test_columnar_build(tmp_path, MythSource):
+    path = tmp_path / "myths.parquet"
+    rows = [dict(value=e.value, aliases=e.aliases) for e in MythSource]
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+    def build(name, source):
+        figure = OnDiskValidator(name, source, search_flag=flags.AliasSearch)
+        figure.func.prepare(force_drop_table=True)
+        return figure
+
+    Columnar = build("ColumnarFigure", EntitySource(path))
+    assert Columnar.func.is_columnar_source
+    assert Columnar["jove"].value == "Zeus"
+
+    # same rows as the records created from entities
+    Records = build("RecordsFigure", MythSource)
+    assert not Records.func.is_columnar_source
+    assert Columnar.func.table.to_arrow() == Records.func.table.to_arrow()
+
+
+def test_columnar_norm_terms(tmp_path):
+    path = tmp_path / "cities.parquet"
+    rows = [
+        dict(value="İstanbul", aliases=["Constantinople "]),
+        dict(value="ΣΊΣΥΦΟΣ", aliases=[" Straße"]),
+    ]
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+    City = OnDiskValidator(
+        "ColumnarCity", EntitySource(path), search_flag=flags.AliasSearch
+    )
+    City.func.prepare(force_drop_table=True)
+
+    # normalized like lookup keys (str.strip().lower())
+    norm_terms = City.func.table.to_arrow().column("norm_term").to_pylist()
+    assert norm_terms == [
+        "İstanbul".lower(),
+        "constantinople",
+        "ΣΊΣΥΦΟΣ".lower(),
+        "straße",
+    ]
+    assert City["İSTANBUL"].value == "İstanbul"
+    assert City["straße"].value == "ΣΊΣΥΦΟΣ"
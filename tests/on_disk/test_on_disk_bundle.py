@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from fuzztypes import OnDiskValidator, bundle, cli, flags, pool
+
+
+@pytest.fixture(scope="session")
+def figure_bundle(MythSource, tmp_path_factory):
+    BundledFigure = OnDiskValidator(
+        "BundledFigure", MythSource, search_flag=flags.AliasSearch
+    )
+    assert BundledFigure["Ulysses"].value == "Odysseus"
+
+    output = str(tmp_path_factory.mktemp("bundles"))
+    (bundle_path,) = cli.export_bundles(["BundledFigure"], output)
+    return bundle_path
+
+
+def test_manifest(figure_bundle):
+    manifest = bundle.read_manifest(figure_bundle)
+    assert manifest["name"] == "BundledFigure"
+    assert manifest["format"] == bundle.BundleFormat
+    assert manifest["fingerprint"]
+
+
+def test_import_bundle(figure_bundle):
+    if "ImportedFigure" in pool.table_names():
+        pool.drop_table("ImportedFigure")
+
+    ImportedFigure = OnDiskValidator(
+        "ImportedFigure",
+        [],  # source is never read, the table comes from the bundle
+        bundle=figure_bundle,
+        search_flag=flags.AliasSearch,
+    )
+    assert ImportedFigure["Ulysses"].value == "Odysseus"
+    assert ImportedFigure["athena"].value == "Athena"
+    assert os.path.exists(pool.table_path("ImportedFigure"))
+
+
+def test_mismatched_bundle_is_rebuilt(figure_bundle, MythSource):
+    if "RebuiltFigure" in pool.table_names():
+        pool.drop_table("RebuiltFigure")
+
+    # case sensitivity changes the fingerprint, bundle is ignored
+    RebuiltFigure = OnDiskValidator(
+        "RebuiltFigure",
+        MythSource,
+        bundle=figure_bundle,
+        search_flag=flags.AliasSearch,
+        case_sensitive=True,
+    )
+    assert RebuiltFigure["Athena"].value == "Athena"
+    with pytest.raises(KeyError):
+        assert RebuiltFigure["athena"]
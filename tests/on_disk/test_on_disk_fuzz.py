@@ -1,46 +1,133 @@
 import os
 
-import tantivy  # type: ignore
+from fuzztypes import (
+    Fuzzmoji,
+    OnDiskValidator,
+    ResolutionCache,
+    flags,
+    pool,
+    validate_python,
+)
 
-from fuzztypes import Fuzzmoji, const, validate_python
 
-
-def test_tantivy():
+def test_trigram_index():
     # make sure the index is built
     assert validate_python(Fuzzmoji, "balloon") == "🎈"
 
-    # standard schema
-    schema_builder = tantivy.SchemaBuilder()
-    schema_builder.add_integer_field("doc_id", stored=True)
-    schema_builder.add_text_field("term", stored=True)
-    schema = schema_builder.build()
+    # trigram index persisted next to the lance table
+    path = os.path.join(pool.table_path("Fuzzmoji"), "_trigrams")
+    assert os.path.exists(os.path.join(path, "postings.npy"))
+
+    # typos inside a token still generate candidates
+    assert validate_python(Fuzzmoji, "baloon") == "🎈"
+    assert validate_python(Fuzzmoji, "thought ballon") == "💭"
+
+
+def test_fuzzmoji():
+    assert validate_python(Fuzzmoji, "thought bubble") == "💭"
+    assert validate_python(Fuzzmoji, "bubble team") == "🧋"
 
-    # create the index
-    path = os.path.join(
-        const.StoredValidatorPath, "Fuzzmoji.lance/_indices/tantivy"
+
+def test_fuzzy_limit_and_cutoff():
+    source = ["Apple", "Applesauce", "Apricot", "Banana"]
+    Fruit = OnDiskValidator(
+        "FuzzFruit",
+        source,
+        search_flag=flags.FuzzSearch,
+        notfound_mode="none",
+        limit=2,
     )
-    index = tantivy.Index(schema, path=path)
-    searcher = index.searcher()
+    assert Fruit["appel"].value == "Apple"
+    assert Fruit["xyz"] is None
 
-    # todo: fuzzy field not in current version
-    # https://github.com/quickwit-oss/tantivy-py/issues/20
-    # https://docs.rs/tantivy/latest/tantivy/query/struct.FuzzyTermQuery.html
-    # index.parse_query("thought", fuzzy_fields={"term": (True, 1, False)})
+    # near misses are dropped when not needed for "did you mean"
+    matches = Fruit.func.get("aple")
+    values = [match.entity.value for match in matches.matches]
+    assert values == ["Apple"]
 
-    # query the index
-    query = index.parse_query("thought bubble")
-    result = searcher.search(query, 5)
+    Fruit = OnDiskValidator(
+        "FuzzFruit",
+        source,
+        search_flag=flags.FuzzSearch,
+        limit=2,
+    )
+    matches = Fruit.func.get("aple")
+    values = [match.entity.value for match in matches.matches]
+    assert values == ["Apple", "Applesauce"]
 
-    # check the results
-    terms = []
-    for score, address in result.hits:
-        doc = searcher.doc(address)
-        terms.extend(doc["term"])
 
-    assert "thought balloon" in terms
-    assert ":bubble_tea:" in terms
+def test_cascade_without_exact_stages():
+    Fruit = OnDiskValidator(
+        "FuzzFruit",
+        ["Apple", "Applesauce", "Apricot", "Banana"],
+        cascade=["fuzz"],
+        search_flag=flags.FuzzSearch,
+        notfound_mode="none",
+    )
+    assert Fruit["banana"].value == "Banana"
+    assert Fruit.func.get_entities(["appel", "xyz"])[0].value == "Apple"
+    assert Fruit.func.get("apple").matches[0].score == 100.0
 
 
-def test_fuzzmoji():
-    assert validate_python(Fuzzmoji, "thought bubble") == "💭"
-    assert validate_python(Fuzzmoji, "bubble team") == "🧋"
+def test_learned_aliases():
+    if "LearnedFruit" in pool.table_names():
+        pool.drop_table("LearnedFruit")
+
+    Fruit = OnDiskValidator(
+        "LearnedFruit",
+        ["Apple", "Applesauce", "Apricot", "Banana"],
+        learn=True,
+        learn_limit=1,
+        learn_threshold=80.0,
+        search_flag=flags.FuzzSearch,
+    )
+    assert Fruit["appel"].value == "Apple"
+    assert Fruit.func.get("appel").stage == "exact"
+
+    # persisted next to the table, shared by storages of the table
+    Other = OnDiskValidator("LearnedFruit", [], search_flag=flags.FuzzSearch)
+    assert Other.func.learned_aliases() == ["appel"]
+    assert Other["appel"].value == "Apple"
+
+    # oldest learned alias is evicted once learn_limit is reached
+    assert Fruit.func.confirm("banan", "Banana")
+    assert Fruit.func.learned_aliases() == ["banan"]
+    assert Fruit.func.get("appel").stage == "fuzz"
+
+
+def test_learned_aliases_batched():
+    Fruit = OnDiskValidator(
+        "BatchLearnedFruit",
+        ["Apple", "Applesauce", "Apricot", "Banana"],
+        learn=True,
+        learn_threshold=80.0,
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    storage.prepare(force_drop_table=True)
+    version = storage.table.version
+
+    # aliases learned by a batch are added to the table in one append
+    entities = storage.get_entities(["appel", "banan", "appel"])
+    assert [e.value for e in entities] == ["Apple", "Banana", "Apple"]
+    assert storage.learned_aliases() == ["appel", "banan"]
+    assert storage.table.version == version + 1
+    assert storage.get("banan").stage == "exact"
+
+
+def test_resolution_cache(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "cache.sqlite3"))
+    Fruit = OnDiskValidator(
+        "CachedFruit",
+        ["Apple", "Banana"],
+        resolution_cache=cache,
+        search_flag=flags.FuzzSearch,
+    )
+    storage = Fruit.func
+    storage.prepare(force_drop_table=True)
+    assert Fruit["appel"].value == "Apple"
+    assert storage.lookup(["appel"])[0].stage == "cache"
+
+    # rebuilding the table invalidates its cached outcomes
+    storage.prepare(force_drop_table=True)
+    assert storage.lookup(["appel"])[0].stage == "fuzz"
@@ -0,0 +1,82 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pytest
+
+from fuzztypes import pool
+
+schema = pa.schema([pa.field("term", pa.string())])
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield str(tmp_path)
+    pool.reset()
+
+
+def test_shared_connection_and_table(db_path):
+    assert pool.connect(db_path) is pool.connect(db_path)
+
+    created = pool.create_table("Shared", schema, path=db_path)
+    assert "Shared" in pool.table_names(db_path)
+    assert pool.open_table("Shared", path=db_path) is created
+
+
+def test_drop_table(db_path):
+    pool.create_table("Dropped", schema, path=db_path)
+    pool.drop_table("Dropped", path=db_path)
+    assert "Dropped" not in pool.table_names(db_path)
+    assert "Dropped" not in pool.table_names(db_path, refresh=True)
+
+
+def test_reopen_after_fork(db_path, monkeypatch):
+    conn = pool.connect(db_path)
+    table = pool.create_table("Forked", schema, path=db_path)
+    lock = pool.table_lock("Forked", path=db_path)
+
+    # simulate first access from a forked child process
+    monkeypatch.setattr(pool, "_pid", os.getpid() + 1)
+
+    assert pool.connect(db_path) is not conn
+    assert pool.open_table("Forked", path=db_path) is not table
+    assert pool.table_lock("Forked", path=db_path) is not lock
+
+
+def test_thread_safe_open(db_path):
+    pool.create_table("Threaded", schema, path=db_path)
+    pool.reset()
+
+    def open_table(_):
+        return pool.open_table("Threaded", path=db_path)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tables = list(executor.map(open_table, range(32)))
+
+    assert len({id(table) for table in tables}) == 1
+
+
+def test_table_metadata(db_path):
+    pool.create_table("Meta", schema, path=db_path)
+    assert pool.get_metadata("Meta", path=db_path) == {}
+
+    pool.update_metadata("Meta", path=db_path, index=dict(nprobes=4))
+    pool.update_metadata("Meta", path=db_path, dimensions=8)
+
+    # re-read from disk
+    pool.reset()
+    meta = pool.get_metadata("Meta", path=db_path)
+    assert meta == dict(index=dict(nprobes=4), dimensions=8)
+
+    pool.drop_table("Meta", path=db_path)
+    assert pool.get_metadata("Meta", path=db_path) == {}
+
+    # missing metadata is not cached, e.g. written by another process
+    pool.create_table("Meta", schema, path=db_path)
+    meta_path = os.path.join(
+        pool.table_path("Meta", path=db_path), pool.MetadataFileName
+    )
+    with open(meta_path, "w") as fp:
+        json.dump(dict(dimensions=4), fp)
+    assert pool.get_metadata("Meta", path=db_path) == dict(dimensions=4)
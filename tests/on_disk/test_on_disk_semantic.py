@@ -1,7 +1,10 @@
+import zlib
+
+import numpy as np
 import pytest
 from pydantic import BaseModel
 
-from fuzztypes import flags, on_disk, Vibemoji, validate_python
+from fuzztypes import flags, on_disk, pool, Vibemoji, validate_python
 
 
 @pytest.fixture(scope="session")
@@ -25,6 +28,71 @@ def test_check_storage_directly(EmotionStoredValidatorStorage):
     assert matches[0].score == pytest.approx(91.23)
 
 
+def test_score_cutoff(EmotionStoredValidatorStorage, EmotionSource):
+    storage = on_disk.StoredValidatorStorage(
+        "Emotions",
+        EmotionSource,
+        search_flag=flags.SemanticSearch,
+        notfound_mode="none",
+        min_similarity=90.0,
+    )
+
+    storage.prepare()
+
+    # near misses are only kept to build "did you mean" errors
+    matches = storage.get("scared")
+    assert all(match.score >= 90.0 for match in matches.matches)
+    assert matches[0].entity.value == "Fear"
+
+
+def test_vector_dimensions(EmotionStoredValidatorStorage):
+    meta = pool.get_metadata("Emotions")
+    assert meta["dimensions"] == EmotionStoredValidatorStorage.vect_dimensions
+    assert "vector" in EmotionStoredValidatorStorage.table.schema.names
+
+
+class HashEncoder:
+    """Stub encoder: a random vector seeded by each text."""
+
+    def encode(self, texts, device=None):
+        return np.stack(
+            [
+                np.random.default_rng(zlib.crc32(text.encode())).normal(
+                    size=16
+                )
+                for text in texts
+            ]
+        ).astype(np.float32)
+
+
+def test_calibrate_index():
+    source = [f"entity {i}" for i in range(600)]
+
+    def create(**kwargs):
+        return on_disk.StoredValidatorStorage(
+            "Calibrated",
+            source,
+            encoder=HashEncoder(),
+            search_flag=flags.SemanticSearch,
+            **kwargs,
+        )
+
+    storage = create()
+    storage.prepare(force_drop_table=True)
+
+    index = pool.get_metadata("Calibrated")["index"]
+    assert index["num_partitions"] == 2
+    assert {"nprobes", "refine_factor", "recall"} <= set(index)
+    assert 0.0 <= index["recall"] <= 1.0
+    assert storage.query_params == (index["nprobes"], index["refine_factor"])
+    assert storage.get("entity 7")[0].entity.value == "entity 7"
+
+    # options override the calibrated parameters
+    tuned = create(nprobes=2, refine_factor=3)
+    tuned.prepare()
+    assert tuned.query_params == (2, 3)
+
+
 class MyModel(BaseModel):
     emoji: Vibemoji
 
@@ -34,3 +102,14 @@ def test_vibemoji_get_value():
     assert validate_python(Vibemoji, "take the bus to school") == "🚌"
     assert validate_python(Vibemoji, "jolly santa") == "🎅"
     assert validate_python(Vibemoji, "United States") == "🇺🇸"
+
+
+def test_tune_index():
+    params = on_disk.tune_index(num_records=10_000, dimensions=384)
+    assert params == dict(num_partitions=39, num_sub_vectors=48)
+
+    params = on_disk.tune_index(num_records=1_000_000, dimensions=384)
+    assert params == dict(num_partitions=1000, num_sub_vectors=48)
+
+    params = on_disk.tune_index(num_records=300, dimensions=10)
+    assert params == dict(num_partitions=1, num_sub_vectors=5)
@@ -0,0 +1,62 @@
+import multiprocessing
+import time
+
+from fuzztypes import ResolutionCache
+
+
+def test_get_and_put(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "cache.sqlite3"))
+    cache.put_many("s1", {"apple": ('{"value": "Apple"}', 100.0, [])})
+    cache.put_many("s1", {"appel": (None, None, [["Apple", 72.0]])})
+
+    found = cache.get_many("s1", ["apple", "appel", "banana"])
+    assert found == {
+        "apple": ('{"value": "Apple"}', 100.0, []),
+        "appel": (None, None, [["Apple", 72.0]]),
+    }
+
+    # other storage identities don't share entries
+    assert cache.get_many("s2", ["apple"]) == {}
+
+    cache.delete("s2", ["apple"])
+    cache.delete("s1", ["apple", "banana"])
+    assert set(cache.get_many("s1", ["apple", "appel"])) == {"appel"}
+
+
+def test_ttl_and_max_entries(tmp_path):
+    cache = ResolutionCache(path=str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.put_many("s1", {"apple": ('{"value": "Apple"}', 100.0, [])})
+
+    cache.ttl = 0.0
+    time.sleep(0.01)
+    assert cache.get_many("s1", ["apple"]) == {}
+
+    cache.ttl = None
+    cache.max_entries = 2
+    for key in ("a", "b", "c"):
+        cache.put_many("s1", {key: (None, None, [])})
+        time.sleep(0.01)
+    cache.evict()
+    assert set(cache.get_many("s1", ["apple", "a", "b", "c"])) == {"b", "c"}
+
+
+def write_entries(path, start):
+    cache = ResolutionCache(path=path)
+    for i in range(start, start + 50):
+        cache.put_many("s1", {f"key-{i}": (None, None, [])})
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=write_entries, args=(path, start))
+        for start in (0, 50, 100)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+    keys = [f"key-{i}" for i in range(150)]
+    assert len(ResolutionCache(path=path).get_many("s1", keys)) == 150
@@ -0,0 +1,64 @@
+from datetime import date
+from typing import Optional
+
+import pyarrow as pa
+
+from fuzztypes import NamedEntity, codec
+from fuzztypes.language import (
+    LanguageNamedEntity,
+    LanguageScope,
+    LanguageType,
+)
+
+
+class Event(NamedEntity):
+    day: Optional[date] = None
+    tags: list[str] = []
+
+
+def test_language_struct():
+    entity_codec = codec.get_codec(LanguageNamedEntity)
+    arrow_type = entity_codec.arrow_type
+    assert arrow_type.field("value").type == pa.string()
+    assert arrow_type.field("aliases").type == pa.list_(pa.string())
+    assert arrow_type.field("scope").type == pa.string()
+    assert arrow_type.field("meta").type == pa.string()  # json
+
+    entity = LanguageNamedEntity(
+        value="English",
+        aliases=["en", "eng"],
+        alpha_2="en",
+        alpha_3="eng",
+        scope=LanguageScope.INDIVIDUAL,
+        type=LanguageType.LIVING,
+        meta=dict(source="iso"),
+    )
+    data = entity_codec.encode(entity)
+    assert data["scope"] == "I"
+    assert data["meta"] == '{"source": "iso"}'
+
+    # round trip through an Arrow struct column
+    column = pa.array([data], type=arrow_type)
+    decoded = entity_codec.decode(column.to_pylist()[0])
+    assert isinstance(decoded, LanguageNamedEntity)
+    assert decoded.scope is LanguageScope.INDIVIDUAL
+    assert decoded.source == "iso"
+    assert decoded.model_dump() == entity.model_dump()
+
+
+def test_json_fallback():
+    entity_codec = codec.get_codec(Event)
+    assert entity_codec.kinds["day"] == "json"
+    assert entity_codec.kinds["tags"] == "scalar"
+
+    entity = Event(value="Launch", day=date(2024, 5, 1), tags=["a"])
+    decoded = entity_codec.decode(entity_codec.encode(entity))
+    assert decoded.day == date(2024, 5, 1)
+    assert decoded == entity
+
+
+def test_legacy_json_string():
+    entity_codec = codec.get_codec(NamedEntity)
+    decoded = entity_codec.decode('{"value":"Zeus","aliases":["Jove"]}')
+    assert decoded.value == "Zeus"
+    assert decoded.aliases == ["Jove"]
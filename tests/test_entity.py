@@ -1,4 +1,15 @@
-from fuzztypes import NamedEntity, InMemoryValidator, EntitySource
+import os
+import pickle
+
+import pytest
+from pydantic import ValidationError
+
+from fuzztypes import (
+    CompactEntity,
+    NamedEntity,
+    InMemoryValidator,
+    EntitySource,
+)
 
 
 def test_entity_conv():
@@ -46,6 +57,32 @@ def test_meta_edge_cases():
     assert entity.label == "LABEL"
 
 
+def test_compact_entity():
+    entity = NamedEntity(value="a", aliases=["b"], meta=dict(c=1))
+    compact = CompactEntity.from_entity(entity)
+    assert compact.value == "a"
+    assert compact.aliases == ("b",)
+    assert compact.c == 1
+    assert compact == entity
+    assert not hasattr(compact, "__dict__")
+
+    with pytest.raises(AttributeError):
+        compact.value = "z"
+
+    with pytest.raises(AttributeError):
+        assert compact.unknown
+
+    full = compact.materialize()
+    assert type(full) is NamedEntity
+    assert full.model_dump() == entity.model_dump()
+
+    # materialized lists are copies of the compact tuples
+    full.aliases.append("x")
+    assert compact.aliases == ("b",)
+
+    assert pickle.loads(pickle.dumps(compact)).materialize() == entity
+
+
 def test_csv_load(EmojiSource):
     Emoji = InMemoryValidator(EmojiSource)
     assert Emoji["happy"].value == "happy"
@@ -85,3 +122,217 @@ def test_entity_source_from_callable():
     entity = source[0]
     assert isinstance(entity, NamedEntity)
     assert entity.value == "hi!"
+
+
+def test_streaming_source(data_path):
+    path = data_path / "mixed.jsonl"
+    source = EntitySource(path, stream=True, chunk_size=2)
+    chunks = list(source.iter_chunks())
+    assert [len(chunk) for chunk in chunks][:2] == [2, 2]
+
+    # iterating streams the file, nothing is held by the source
+    values = [e.value for chunk in chunks for e in chunk]
+    assert [e.value for e in source] == values
+    assert source.loaded is False
+    assert source.entities == []
+
+    fruit = source["fruit"]
+    assert fruit.stream is True
+    assert len(fruit) == 3
+    assert fruit.loaded is False
+
+    Fruit = InMemoryValidator(fruit, case_sensitive=True, notfound_mode="none")
+    assert Fruit["Pome"].value == "Apple"
+
+
+def test_streaming_sv_source(data_path):
+    source = EntitySource(data_path / "myths.tsv", stream=True, chunk_size=2)
+    assert [len(chunk) for chunk in source.iter_chunks()] == [2, 2, 1]
+    assert len(source) == 5
+    assert source.loaded is False
+
+
+def test_jsonl_blocks(tmp_path):
+    path = tmp_path / "entities.jsonl"
+    path.write_text(
+        '{"value": "Apple", "aliases": ["Pome"], "priority": 1}\n'
+        '["Banana", "Plantain"]\n'
+        "\n"
+        '"Cherry"\n'
+    )
+
+    # invalid block falls back to converting line by line
+    entities = EntitySource.from_jsonl(path)
+    assert [e.value for e in entities] == ["Apple", "Banana", "Cherry"]
+    assert entities[1].aliases == ["Plantain"]
+
+    source = EntitySource(path, chunk_size=1)
+    assert [e.value for e in source] == ["Apple", "Banana", "Cherry"]
+    assert source[0].priority == 1
+
+    path.write_text('{"value": "Apple", "priority": "high"}\n')
+    with pytest.raises(ValidationError):
+        EntitySource.from_jsonl(path)
+
+
+def test_label_index(data_path):
+    source = EntitySource(data_path / "mixed.jsonl")
+    fruit, animal = source["fruit"], source["animal"]
+    assert [e.value for e in fruit] == ["Apple", "Banana", "Strawberry"]
+    assert fruit[1:] == ["Banana", "Strawberry"]
+
+    # one pass over the parent indexes every label
+    assert source._label_index == {"animal": [0, 1, 4], "fruit": [2, 3, 5]}
+    assert len(animal) == 3
+    assert animal[2] is source[4]
+
+
+def test_streaming_label_index(data_path):
+    source = EntitySource(data_path / "mixed.jsonl", stream=True)
+    scans = []
+    original = source.iter_chunks
+
+    def iter_chunks():
+        scans.append(1)
+        return original()
+
+    source.iter_chunks = iter_chunks
+    fruit, animal = source["fruit"], source["animal"]
+    assert len(fruit) == 3
+    assert len(animal) == 3
+    assert len(scans) == 1
+
+
+def test_streaming_label_groups_not_kept(data_path):
+    source = EntitySource(data_path / "mixed.jsonl", stream=True)
+    fruit = source["fruit"]
+    assert [e.value for e in fruit] == ["Apple", "Banana", "Strawberry"]
+
+    # only requested labels are grouped, and handed over to sub-sources
+    assert source._label_groups == {}
+    assert len(source["animal"]) == 3
+    assert source._label_groups == {}
+
+
+@pytest.fixture
+def fruit_table():
+    pa = pytest.importorskip("pyarrow")
+    return pa.table(
+        {
+            "term": ["Apple", "Banana", "Cherry"],
+            "synonyms": ["Pome|Malus", "", None],
+            "kind": ["fruit", "fruit", "berry"],
+            "rank": [1, None, 3],
+            "color": ["red", "yellow", "red"],
+        }
+    )
+
+
+@pytest.mark.parametrize("ext", ["parquet", "arrow"])
+def test_columnar_source(tmp_path, fruit_table, ext):
+    feather = pytest.importorskip("pyarrow.feather")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    path = tmp_path / f"fruits.{ext}"
+    if ext == "parquet":
+        pq.write_table(fruit_table, path)
+    else:
+        feather.write_feather(fruit_table, path)
+
+    source = EntitySource(
+        path,
+        columns=dict(
+            value="term", aliases="synonyms", label="kind", priority="rank"
+        ),
+        meta_columns=["color"],
+        chunk_size=2,
+    )
+    assert source.is_columnar
+    assert [batch.num_rows for batch in source.iter_batches()] == [2, 1]
+
+    apple, banana, cherry = source
+    assert apple.aliases == ["Pome", "Malus"]
+    assert apple.priority == 1
+    assert apple.color == "red"
+    assert banana.aliases == [] and banana.priority is None
+    assert cherry.label == "berry"
+    assert [e.value for e in source["fruit"]] == ["Apple", "Banana"]
+
+
+@pytest.mark.parametrize("compression", ["gz", "bz2", "xz"])
+def test_compressed_sources(tmp_path, data_path, compression):
+    from fuzztypes.entity import open_source
+
+    for name in ("mixed.jsonl", "myths.tsv"):
+        path = tmp_path / f"{name}.{compression}"
+        with open_source(path, "wt") as fp:
+            fp.write((data_path / name).read_text())
+
+        source = EntitySource(path)
+        assert source.ext == name.split(".")[1]
+        expected = list(EntitySource(data_path / name))
+        assert list(source) == expected
+        assert len(EntitySource(path, stream=True)) == len(expected)
+
+
+def test_parallel_sv_parsing(tmp_path, data_path):
+    from fuzztypes.entity import split_ranges
+
+    path = tmp_path / "terms.tsv"
+    lines = [f"Term {i}\tT{i}|t-{i}" for i in range(1000)]
+    path.write_text("value\taliases\n" + "\n".join(lines) + "\n")
+
+    ranges = split_ranges(path, 14, 7)
+    assert ranges[0][0] == 14 and ranges[-1][1] == path.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    expected = [e.model_dump() for e in EntitySource(path)]
+    parallel = [e.model_dump() for e in EntitySource(path, workers=2)]
+    assert parallel == expected
+    assert expected[999]["aliases"] == ["T999", "t-999"]
+
+    emotions = data_path / "emotions.txt"
+    parallel = EntitySource(emotions, workers=3)
+    assert list(parallel) == list(EntitySource(emotions))
+
+
+def test_parse_cache(tmp_path, monkeypatch):
+    from fuzztypes import const
+
+    monkeypatch.setattr(const, "ParseCachePath", str(tmp_path / "cache"))
+    path = tmp_path / "terms.tsv"
+    path.write_text("value\taliases\nApple\tPome|Malus\nBanana\t\n")
+
+    source = EntitySource(path)
+    assert [e.value for e in source] == ["Apple", "Banana"]
+    assert os.path.exists(source.cache_path)
+
+    # cached entities are read without parsing the file
+    def fail(*args, **kwargs):
+        raise AssertionError("parsed")
+
+    cached = EntitySource(path)
+    monkeypatch.setattr(cached, "iter_tsv", fail)
+    assert [e.aliases for e in cached] == [["Pome", "Malus"], []]
+
+    # changed files are parsed again
+    path.write_text("value\taliases\nCherry\t\n")
+    changed = EntitySource(path)
+    assert [e.value for e in changed] == ["Cherry"]
+
+    uncached = EntitySource(path, parse_cache=False)
+    monkeypatch.setattr(uncached, "iter_cached", fail)
+    assert [e.value for e in uncached] == ["Cherry"]
+
+
+def test_parse_cache_not_writable(tmp_path, monkeypatch):
+    from fuzztypes import const
+
+    # e.g. FUZZTYPES_HOME pointing at a file or a read-only image
+    home = tmp_path / "home"
+    home.write_text("")
+    monkeypatch.setattr(const, "ParseCachePath", str(home / "sources"))
+
+    path = tmp_path / "terms.tsv"
+    path.write_text("value\taliases\nApple\tPome|Malus\nBanana\t\n")
+    assert [e.value for e in EntitySource(path)] == ["Apple", "Banana"]
@@ -0,0 +1,43 @@
+import pickle
+
+from fuzztypes.terms import TermStore
+
+
+def test_term_store():
+    store = TermStore()
+    assert store.append("hello", 0, False, term="Hello") == 0
+    assert store.append("🎈", 1, False, term="🎈") == 1
+    assert store.append("hello", 2, True, term="HELLO") == 2
+    assert len(store) == 3
+
+    assert list(store.rows("hello")) == [0, 2]
+    assert list(store.rows("🎈")) == [1]
+    assert store.rows("missing") == ()
+    assert store.term(1) == "🎈"
+    assert store.is_alias(2) and not store.is_alias(0)
+
+    store = pickle.loads(pickle.dumps(store))
+    assert [store.term(row) for row in store.rows("hello")] == [
+        "Hello",
+        "HELLO",
+    ]
+
+    store.remove("hello")
+    assert "hello" not in store
+    assert store.rows("hello") == ()
+
+
+def test_compact():
+    store = TermStore()
+    for i in range(4):
+        store.append(f"key{i}", i, False, term=f"Key{i}")
+
+    store.remove("key0")
+    store.remove("key2")
+    assert len(store) == 4
+
+    # removed rows outnumber half of the rows
+    store.remove("key1")
+    assert len(store) == 1
+    assert [store.term(row) for row in store.rows("key3")] == ["Key3"]
+    assert store.entity_ids[store.rows("key3")[0]] == 3
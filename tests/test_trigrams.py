@@ -0,0 +1,24 @@
+from rapidfuzz.utils import default_process
+
+from fuzztypes.trigrams import TrigramIndex, trigrams
+
+
+def test_trigrams():
+    assert trigrams("") == set()
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_candidates(tmp_path):
+    terms = ["Hello World", "Help", "Yellow", "🎈", "Hello World"]
+    index = TrigramIndex.build(terms, default_process)
+    assert len(index) == 4
+    assert index.term(3) == "🎈"
+
+    path = str(tmp_path / "trigrams")
+    index.save(path)
+    assert TrigramIndex.exists(path)
+
+    index = TrigramIndex.load(path)
+    assert set(index.candidates("helo", 2)) == {"Help", "Hello World"}
+    assert index.candidates("", 2) == []
+    assert index.candidates("zzz", 2) == []